@@ -0,0 +1,138 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ['--no-sandbox', '--disable-setuid-sandbox']
+
+
+class BrowserPool:
+    """Долгоживущий Chromium, который раздает изолированные контексты/страницы"""
+
+    def __init__(self, max_concurrency=4, recycle_after=200, launch_args=None):
+        self.max_concurrency = max_concurrency
+        self.recycle_after = recycle_after
+        self.launch_args = launch_args or LAUNCH_ARGS
+
+        self._playwright = None
+        self._browser = None
+        self._pages_served = 0
+        self._active = {}       # browser -> количество открытых контекстов
+        self._retired = set()   # браузеры, ожидающие закрытия после последней страницы
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._closed = False
+
+    @classmethod
+    def from_env(cls):
+        """Создает пул с параметрами из переменных окружения"""
+        return cls(
+            max_concurrency=int(os.getenv('BROWSER_MAX_CONCURRENCY', '4')),
+            recycle_after=int(os.getenv('BROWSER_RECYCLE_AFTER', '200')),
+        )
+
+    async def start(self):
+        """Запускает Playwright и первый браузер"""
+        async with self._lock:
+            self._closed = False
+            await self._ensure_browser()
+
+    async def stop(self):
+        """Закрывает все браузеры и останавливает Playwright"""
+        async with self._lock:
+            self._closed = True
+            browsers = set(self._active) | self._retired
+            if self._browser is not None:
+                browsers.add(self._browser)
+            for browser in browsers:
+                await self._close_browser(browser)
+            self._browser = None
+            self._active.clear()
+            self._retired.clear()
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info("🛑 Пул браузеров остановлен")
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        """Выдает страницу в отдельном контексте с ограничением параллельности"""
+        async with self._semaphore:
+            browser = await self._acquire_browser()
+            context = None
+            try:
+                context = await browser.new_context(**context_options)
+                page = await context.new_page()
+                yield page
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Не удалось закрыть контекст: {e}")
+                await self._release_browser(browser)
+
+    async def _acquire_browser(self):
+        async with self._lock:
+            if self._closed:
+                raise RuntimeError("Пул браузеров остановлен")
+            await self._ensure_browser()
+            browser = self._browser
+            self._pages_served += 1
+            self._active[browser] = self._active.get(browser, 0) + 1
+            return browser
+
+    async def _release_browser(self, browser):
+        async with self._lock:
+            self._active[browser] = self._active.get(browser, 1) - 1
+            if self._active[browser] <= 0:
+                del self._active[browser]
+                if browser in self._retired:
+                    self._retired.discard(browser)
+                    await self._close_browser(browser)
+
+    async def _ensure_browser(self):
+        """Запускает браузер, если его нет, он упал или отработал свой лимит страниц"""
+        browser = self._browser
+        if browser is not None:
+            if browser.is_connected() and self._pages_served < self.recycle_after:
+                return
+            reason = "лимит страниц" if browser.is_connected() else "браузер упал"
+            logger.info(f"♻️ Перезапуск браузера: {reason} ({self._pages_served} страниц)")
+            self._browser = None
+            if self._active.get(browser):
+                self._retired.add(browser)
+            else:
+                await self._close_browser(browser)
+
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+
+        self._browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=self.launch_args
+        )
+        self._pages_served = 0
+        logger.info("✅ Браузер пула запущен")
+
+    async def _close_browser(self, browser):
+        try:
+            if browser.is_connected():
+                await browser.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка при закрытии браузера: {e}")
+
+
+# Глобальный пул, создается при первом обращении
+browser_pool = None
+
+def get_browser_pool():
+    """Возвращает общий пул браузеров"""
+    global browser_pool
+    if browser_pool is None:
+        browser_pool = BrowserPool.from_env()
+    return browser_pool
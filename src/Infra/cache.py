@@ -0,0 +1,135 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleCache:
+    """Асинхронный TTL/LRU кэш расписаний с объединением одинаковых запросов"""
+
+    def __init__(self, ttl=900, max_size=512):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()   # key -> (value, stored_at, производные значения)
+        self._in_flight = {}            # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.rendered = 0
+        self.rendered_hits = 0
+
+    @classmethod
+    def from_env(cls):
+        """Создает кэш с параметрами из переменных окружения"""
+        return cls(
+            ttl=int(os.getenv('SCHEDULE_CACHE_TTL', '900')),
+            max_size=int(os.getenv('SCHEDULE_CACHE_SIZE', '512')),
+        )
+
+    def get(self, key):
+        """Возвращает свежее значение или None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at, _ = entry
+        if time.monotonic() - stored_at > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def peek(self, key):
+        """Последнее значение без учета TTL: (value, stored_at по time.time()) или None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at, _ = entry
+        return value, time.time() - (time.monotonic() - stored_at)
+
+    def attached(self, key, value, name, build):
+        """Производное от value (например, готовые сообщения): строится один раз
+        и живет, пока в кэше лежит именно эта версия value"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not value:
+            return build()
+        derived = entry[2]
+        result = derived.get(name)
+        if result is None:
+            result = derived[name] = build()
+            self.rendered += 1
+        else:
+            self.rendered_hits += 1
+        return result
+
+    def put(self, key, value):
+        """Сохраняет значение, вытесняя самые старые записи"""
+        self._entries[key] = (value, time.monotonic(), {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    async def get_or_load(self, key, loader):
+        """Возвращает значение из кэша или загружает его через loader()"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if key in self._in_flight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        return await self._load(key, loader)
+
+    async def refresh(self, key, loader):
+        """Принудительно обновляет значение (для фоновой подгрузки)"""
+        return await self._load(key, loader)
+
+    async def _load(self, key, loader):
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run_loader(key, loader))
+            self._in_flight[key] = task
+        # shield: отмена одного ожидающего не должна отменять общую загрузку
+        return await asyncio.shield(task)
+
+    async def _run_loader(self, key, loader):
+        try:
+            value = await loader()
+            # Неудачный парсинг (None) не кэшируем; пустая неделя — обычный результат
+            if value is not None:
+                self.put(key, value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self):
+        """Счетчики для мониторинга"""
+        return {
+            'size': len(self._entries),
+            'in_flight': len(self._in_flight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'rendered': self.rendered,
+            'rendered_hits': self.rendered_hits,
+        }
+
+
+# Глобальный кэш, создается при первом обращении
+schedule_cache = None
+
+def get_schedule_cache():
+    """Возвращает общий кэш расписаний"""
+    global schedule_cache
+    if schedule_cache is None:
+        schedule_cache = ScheduleCache.from_env()
+    return schedule_cache
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import logging
+from Infra.storage import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+def day_hash(day):
+    """Хэш содержимого дня: меняется только если изменились занятия"""
+    # Исходный текст не зависит от правил разбора: исправление парсера не рассылает «изменения»
+    payload = '\n'.join(
+        lesson.text or '\x1f'.join((str(lesson.pair), lesson.start, lesson.end, lesson.subject,
+                                    lesson.kind, lesson.teacher, lesson.room))
+        for lesson in day.lessons
+    )
+    return hashlib.sha1(f"{day.title}\n{payload}".encode('utf-8')).hexdigest()
+
+
+def day_key(day):
+    """Дата дня (ISO), а без даты — позиция на странице"""
+    return day.date.isoformat() if day.date is not None else day.number
+
+
+def schedule_hashes(schedule):
+    return {day_key(day): day_hash(day) for day in schedule}
+
+
+def diff_schedules(old_hashes, new_schedule):
+    """Структурный diff по дням: какие дни добавились, изменились и исчезли"""
+    new_hashes = schedule_hashes(new_schedule)
+    old_dates = [key for key in old_hashes if isinstance(key, str)]
+    new_dates = [key for key in new_hashes if isinstance(key, str)]
+    if bool(old_dates) != bool(new_dates):
+        # Снимки с разными ключами (позиция/дата) сравнивать нельзя
+        return {'added': [], 'changed': [], 'removed': []}
+
+    added = [day for day in new_schedule if day_key(day) not in old_hashes]
+    changed = [
+        day for day in new_schedule
+        if day_key(day) in old_hashes and old_hashes[day_key(day)] != new_hashes[day_key(day)]
+    ]
+    removed = [key for key in old_hashes if key not in new_hashes]
+    if old_dates:
+        # Смена недели: дни после старого окна и ушедшие прошлые дни — не изменения расписания
+        last_known, first_shown = max(old_dates), min(new_dates)
+        added = [day for day in added if day.date is None or day.date.isoformat() <= last_known]
+        removed = [key for key in removed if not isinstance(key, str) or key >= first_shown]
+    return {'added': added, 'changed': changed, 'removed': sorted(removed, key=str)}
+
+
+class ChangeTracker:
+    """Хранит снимок расписания каждой группы и сообщает подписчикам об изменениях"""
+
+    def __init__(self, store):
+        self.store = store
+        self._hashes = {}       # group_url -> {дата или номер дня: хэш}
+        self._listeners = []
+        self._notifications = set()     # фоновые рассылки, чтобы их не собрал GC
+
+    @classmethod
+    def from_env(cls):
+        return cls(SnapshotStore.from_env())
+
+    def subscribe(self, callback):
+        """callback(group_url, diff) вызывается, когда расписание группы изменилось"""
+        self._listeners.append(callback)
+
+    def current(self, group_url):
+        """Хэши последней записанной версии расписания группы или None"""
+        return self._hashes.get(group_url)
+
+    async def record(self, group_url, schedule):
+        """Сохраняет новый снимок и возвращает diff (None, если сравнивать не с чем или нет изменений)"""
+        old_hashes = self._hashes.get(group_url)
+        if old_hashes is None:
+            snapshot = await asyncio.to_thread(self.store.load, group_url)
+            old_hashes = snapshot[1] if snapshot else None
+
+        new_hashes = schedule_hashes(schedule)
+        self._hashes[group_url] = new_hashes
+        if old_hashes == new_hashes:
+            return None
+
+        await asyncio.to_thread(self.store.save, group_url, schedule, new_hashes)
+        if old_hashes is None:
+            # Первый снимок группы: уведомлять не о чем
+            return None
+
+        diff = diff_schedules(old_hashes, schedule)
+        if not any(diff.values()):
+            return None
+        logger.info(
+            f"🔔 Расписание {group_url} изменилось: +{len(diff['added'])} "
+            f"~{len(diff['changed'])} -{len(diff['removed'])} дней"
+        )
+        # Рассылка идет в фоне: загрузчик кэша (и все, кто ждет его результат) не ждет ее
+        for callback in self._listeners:
+            task = asyncio.create_task(callback(group_url, diff))
+            self._notifications.add(task)
+            task.add_done_callback(self._notification_done)
+        return diff
+
+    def _notification_done(self, task):
+        self._notifications.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ Ошибка уведомления об изменениях: {task.exception()}")
+
+
+# Глобальный трекер, создается при первом обращении
+change_tracker = None
+
+def get_change_tracker():
+    """Возвращает общий трекер изменений расписаний"""
+    global change_tracker
+    if change_tracker is None:
+        change_tracker = ChangeTracker.from_env()
+    return change_tracker
@@ -0,0 +1,302 @@
+"""Обход каталога групп на сайте расписания и сборка groups_data.json.
+
+Запуск из папки src:
+    python -m Infra.crawler [--output groups_data.json] [--fresh]
+
+Страницы каталога (факультеты, курсы) обходятся в ширину через общий пул
+браузеров; ссылки вида #/Rasp/Group/<id> становятся записями «название → URL».
+Состояние обхода периодически сохраняется в CRAWL_STATE_PATH, так что
+прерванный обход продолжается с того же места.
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from dataclasses import replace
+from urllib.parse import urlsplit
+from Infra.browser_pool import get_browser_pool
+from Infra.scrape_profile import ScrapeProfile
+from Infra.metrics import span, record_failure
+
+logger = logging.getLogger(__name__)
+
+# Корень каталога расписаний: список факультетов
+DEFAULT_START_URL = 'https://lk2.stgau.ru/WebApp/#/Rasp'
+
+# Страница расписания группы и страницы каталога внутри SPA
+GROUP_URL_RE = re.compile(r'#/Rasp/Group/\d+$')
+CATALOGUE_URL_RE = re.compile(r'#/Rasp(/|$)')
+
+# Ссылки каталога появляются после отрисовки SPA
+LINK_SELECTOR = 'a[href*="#/Rasp/"]'
+
+# Все ссылки страницы за один evaluate: [[абсолютный href, текст], ...]
+EXTRACT_LINKS_JS = """
+() => Array.from(document.querySelectorAll('a[href]'))
+    .map(a => [a.href, (a.textContent || '').trim()])
+"""
+
+
+def classify_link(href, site):
+    """'group', 'catalogue' или None для ссылок вне каталога расписаний"""
+    if urlsplit(href).hostname != site:
+        return None
+    if GROUP_URL_RE.search(href):
+        return 'group'
+    if CATALOGUE_URL_RE.search(href):
+        return 'catalogue'
+    return None
+
+
+def write_json_atomic(path, data):
+    """Запись через временный файл: читатель никогда не увидит половину файла"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class GroupCrawler:
+    """Обход каталога в ширину с ограничением параллельности и паузами"""
+
+    def __init__(self, start_url=DEFAULT_START_URL, state_path='data/crawl_state.json',
+                 concurrency=3, delay=1.0, jitter=0.3, max_pages=2000, max_attempts=3,
+                 checkpoint_every=10):
+        self.start_url = start_url
+        self.state_path = state_path
+        self.concurrency = concurrency
+        self.delay = delay                      # минимальная пауза между запросами, с
+        self.jitter = jitter
+        self.max_pages = max_pages              # защита от бесконечного каталога
+        self.max_attempts = max_attempts
+        self.checkpoint_every = checkpoint_every
+
+        self.site = urlsplit(start_url).hostname
+        self.profile = replace(ScrapeProfile.from_env(LINK_SELECTOR), wait_selector=LINK_SELECTOR)
+        self.visited = set()
+        self.frontier = [start_url]
+        self.attempts = {}
+        self.failed = set()
+        self.groups = {}
+
+        self._next_start = 0.0
+        self._pace_lock = asyncio.Lock()
+        self._since_checkpoint = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            start_url=os.getenv('CRAWL_START_URL', DEFAULT_START_URL),
+            state_path=os.getenv('CRAWL_STATE_PATH', 'data/crawl_state.json'),
+            concurrency=int(os.getenv('CRAWL_CONCURRENCY', '3')),
+            delay=float(os.getenv('CRAWL_DELAY', '1.0')),
+            max_pages=int(os.getenv('CRAWL_MAX_PAGES', '2000')),
+        )
+
+    def load_state(self):
+        """Продолжает прерванный обход того же каталога. Возвращает True, если было что продолжать"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Чекпоинт обхода не прочитан, начинаю заново: {e}")
+            return False
+
+        if state.get('start_url') != self.start_url:
+            logger.info("ℹ️ Чекпоинт от другого стартового URL, начинаю заново")
+            return False
+        if state.get('complete'):
+            logger.info("ℹ️ Прошлый обход завершен, начинаю заново")
+            return False
+
+        self.visited = set(state.get('visited', []))
+        self.frontier = [url for url in state.get('frontier', []) if url not in self.visited]
+        self.attempts = dict(state.get('attempts', {}))
+        self.failed = set(state.get('failed', []))
+        self.groups = dict(state.get('groups', {}))
+        logger.info(
+            f"↩️ Продолжаю обход: посещено {len(self.visited)}, в очереди {len(self.frontier)}, "
+            f"групп {len(self.groups)}"
+        )
+        return True
+
+    def save_state(self, complete=False):
+        write_json_atomic(self.state_path, {
+            'start_url': self.start_url,
+            'complete': complete,
+            'visited': sorted(self.visited),
+            'frontier': self.frontier,
+            'attempts': self.attempts,
+            'failed': sorted(self.failed),
+            'groups': self.groups,
+            'saved_at': time.time(),
+        })
+        self._since_checkpoint = 0
+
+    def clear_state(self):
+        """Удаляет чекпоинт: следующий запуск начнет обход заново"""
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+
+    async def _pace(self):
+        """Выдерживает паузу между стартами запросов ко всему сайту"""
+        async with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.delay * (1 + random.uniform(0, self.jitter))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def fetch_links(self, url):
+        """Ссылки страницы каталога через страницу из общего пула браузеров"""
+        await self._pace()
+        async with get_browser_pool().page() as page:
+            await self.profile.apply(page, url)
+            with span('crawl'):
+                await page.goto(url, wait_until=self.profile.wait_until, timeout=self.profile.goto_timeout)
+                try:
+                    await page.wait_for_selector(LINK_SELECTOR, timeout=self.profile.selector_timeout)
+                except Exception:
+                    # Страница без ссылок каталога: лист дерева или пустой факультет
+                    record_failure('crawl', kind='no_links')
+                return await page.evaluate(EXTRACT_LINKS_JS)
+
+    def _absorb(self, links):
+        """Разносит ссылки по группам и очереди обхода"""
+        for href, text in links:
+            kind = classify_link(href, self.site)
+            if kind == 'group':
+                name = ' '.join(text.split())
+                if not name:
+                    continue
+                known = self.groups.get(name)
+                if known is not None and known != href:
+                    logger.warning(f"⚠️ Группа {name}: {known} и {href}, оставляю первый URL")
+                    continue
+                self.groups[name] = href
+            elif kind == 'catalogue' and href not in self.visited and href not in self.frontier:
+                self.frontier.append(href)
+
+    async def _visit(self, url):
+        try:
+            links = await self.fetch_links(url)
+        except Exception as e:
+            attempts = self.attempts.get(url, 0) + 1
+            self.attempts[url] = attempts
+            if attempts < self.max_attempts:
+                logger.warning(f"⚠️ {url}: {e}, попытка {attempts}/{self.max_attempts}")
+                self.frontier.append(url)
+            else:
+                logger.error(f"❌ {url}: не загрузилась после {attempts} попыток")
+                self.failed.add(url)
+                self.visited.add(url)
+            return
+
+        self.visited.add(url)
+        self.attempts.pop(url, None)
+        self._absorb(links)
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.save_state()
+
+    async def crawl(self):
+        """Обходит каталог до исчерпания очереди и возвращает {название: URL}"""
+        in_flight = {}     # задача -> URL
+        complete = False
+        try:
+            while self.frontier or in_flight:
+                while self.frontier and len(in_flight) < self.concurrency:
+                    if len(self.visited) + len(in_flight) >= self.max_pages:
+                        logger.warning(f"⚠️ Достигнут лимит {self.max_pages} страниц, обход остановлен")
+                        self.frontier.clear()
+                        break
+                    url = self.frontier.pop(0)
+                    if url in self.visited or url in in_flight.values():
+                        continue
+                    in_flight[asyncio.create_task(self._visit(url))] = url
+                if not in_flight:
+                    break
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del in_flight[task]
+            complete = True
+        finally:
+            for task in in_flight:
+                task.cancel()
+            # Недообработанные страницы вернутся в очередь при следующем запуске;
+            # завершенный обход помечается, чтобы его не «продолжили» впустую
+            self.frontier.extend(in_flight.values())
+            self.save_state(complete=complete)
+
+        logger.info(
+            f"✅ Обход завершен: страниц {len(self.visited)}, групп {len(self.groups)}, "
+            f"с ошибками {len(self.failed)}"
+        )
+        return dict(sorted(self.groups.items()))
+
+
+async def crawl_groups(output_path, fresh=False, merge=True):
+    """Полный обход каталога с записью результата в формате groups_data.json"""
+    crawler = GroupCrawler.from_env()
+    if fresh:
+        crawler.clear_state()
+    else:
+        crawler.load_state()
+
+    pool = get_browser_pool()
+    await pool.start()
+    try:
+        groups = await crawler.crawl()
+    finally:
+        await pool.stop()
+
+    if not groups:
+        logger.error("❌ Ни одной группы не найдено, файл не изменен")
+        crawler.clear_state()
+        return None
+
+    if merge and os.path.exists(output_path):
+        # Группы, пропавшие с сайта, не удаляем: у пользователей могут быть ссылки на них
+        with open(output_path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+        added = len(set(groups) - set(existing))
+        groups = dict(sorted({**existing, **groups}.items()))
+        logger.info(f"➕ Новых групп: {added}")
+
+    write_json_atomic(output_path, groups)
+    # Результат записан: чекпоинт завершенного обхода больше не нужен
+    crawler.clear_state()
+    logger.info(f"💾 {len(groups)} групп записано в {output_path}")
+    return groups
+
+
+def main():
+    from dotenv import load_dotenv
+    from Infra.logs import setup_logging, stop_logging
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=os.getenv('GROUPS_DATA_PATH', 'groups_data.json'))
+    parser.add_argument('--fresh', action='store_true', help='игнорировать чекпоинт и начать заново')
+    parser.add_argument('--replace', action='store_true', help='не сохранять группы, которых больше нет на сайте')
+    args = parser.parse_args()
+
+    load_dotenv(".env.txt")
+    setup_logging()
+    try:
+        asyncio.run(crawl_groups(args.output, fresh=args.fresh, merge=not args.replace))
+    finally:
+        stop_logging()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Telegram на длину одного сообщения
+MAX_MESSAGE_LENGTH = 4096
+
+
+def pack_messages(blocks, limit=MAX_MESSAGE_LENGTH, separator='\n\n'):
+    """Склеивает блоки текста в минимальное число сообщений не длиннее limit"""
+    messages = []
+    current = ''
+    for block in blocks:
+        for part in _split_block(block, limit):
+            if not current:
+                current = part
+            elif len(current) + len(separator) + len(part) <= limit:
+                current += separator + part
+            else:
+                messages.append(current)
+                current = part
+    if current:
+        messages.append(current)
+    return messages
+
+
+def _split_block(block, limit):
+    """Режет слишком длинный блок по строкам, а строки — по limit символов"""
+    if len(block) <= limit:
+        return [block]
+    parts = []
+    current = ''
+    for line in block.split('\n'):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ''
+            parts.append(line[:limit])
+            line = line[limit:]
+        if not current:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current += '\n' + line
+        else:
+            parts.append(current)
+            current = line
+    if current:
+        parts.append(current)
+    return parts
+
+
+class TokenBucket:
+    """Классический token bucket: rate токенов в секунду, не больше capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def try_acquire(self):
+        """Берет токен без ожидания; False, если лимит исчерпан"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self):
+        """Через сколько секунд появится следующий токен"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def is_full(self):
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class OutboundQueue:
+    """Глобальная очередь исходящих сообщений с лимитами на чат и на бота в целом"""
+
+    def __init__(self, global_rate=25, chat_rate=1, chat_burst=3, workers=4, max_retries=3):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.workers = workers
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats = {}            # chat_id -> TokenBucket
+        self._queue = None
+        self._tasks = []
+        self._paused_until = 0.0    # общий RetryAfter от Telegram
+        self.sent = 0
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls):
+        """Создает очередь с параметрами из переменных окружения"""
+        return cls(
+            global_rate=float(os.getenv('TG_GLOBAL_RATE', '25')),
+            chat_rate=float(os.getenv('TG_CHAT_RATE', '1')),
+            chat_burst=float(os.getenv('TG_CHAT_BURST', '3')),
+            workers=int(os.getenv('TG_SEND_WORKERS', '4')),
+        )
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                # Забываем чаты, которые давно ничего не отправляли
+                self._chats = {cid: b for cid, b in self._chats.items() if not b.is_full()}
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def send(self, bot, chat_id, text, **kwargs):
+        """Ставит сообщение в очередь и ждет его отправки"""
+        self.start()
+        # Лимит чата соблюдается до постановки в очередь, чтобы не занимать воркеры ожиданием
+        await self._chat_bucket(chat_id).acquire()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((future, bot, chat_id, text, kwargs))
+        return await future
+
+    async def _worker(self):
+        from telegram.error import RetryAfter
+
+        while True:
+            future, bot, chat_id, text, kwargs = await self._queue.get()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    pause = self._paused_until - time.monotonic()
+                    if pause > 0:
+                        await asyncio.sleep(pause)
+                    await self._global.acquire()
+                    try:
+                        message = await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                    except RetryAfter as e:
+                        if attempt == self.max_retries:
+                            raise
+                        self.retries += 1
+                        self._paused_until = max(self._paused_until, time.monotonic() + float(e.retry_after))
+                        logger.warning(f"⏳ Flood control: повтор через {e.retry_after} с (чат {chat_id})")
+                        continue
+                    self.sent += 1
+                    if not future.done():
+                        future.set_result(message)
+                    break
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+
+# Глобальная очередь, создается при первом обращении
+outbound_queue = None
+
+def get_outbound_queue():
+    """Возвращает общую очередь исходящих сообщений"""
+    global outbound_queue
+    if outbound_queue is None:
+        outbound_queue = OutboundQueue.from_env()
+    return outbound_queue
@@ -0,0 +1,151 @@
+import os
+import time
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# То же, что SCHEDULE_ROOT_SELECTOR в sheedule.py, но в XPath.
+# CSS div:nth-child(n) = n-й дочерний элемент, и он div: *[n][self::div]
+ROOT_XPATH = '//*[@id="page-main"]/div/div/*[7][self::div]/div/div'
+
+# Сколько помнить, что сайт отдает страницу без данных (нужен JS)
+CSR_MEMORY_SECONDS = 3600
+
+# Сколько не пробовать HTTP после сетевой ошибки или таймаута: медленный сайт
+# не должен каждый раз съедать часть общего дедлайна перед браузером
+NETWORK_BACKOFF_SECONDS = 120
+
+
+def parse_schedule_html(html):
+    """Разбор расписания из готового HTML.
+
+    Возвращает тот же список container_number/lessons, что и extract_schedule,
+    или None, если данных в HTML нет и страницу нужно рендерить в браузере.
+    """
+    from lxml import html as lxml_html
+
+    if not html or 'page-main' not in html:
+        return None
+    document = lxml_html.fromstring(html)
+    if not document.xpath(ROOT_XPATH):
+        return None
+
+    days = []
+    day_num = 1
+    while True:
+        day_path = f'{ROOT_XPATH}/*[{day_num}][self::div]/div/div'
+        if not document.xpath(f'({day_path})[1]'):
+            break
+
+        lessons = []
+        lesson_num = 1
+        while True:
+            found = document.xpath(f'({day_path}/*[{lesson_num}][self::div])[1]')
+            if not found:
+                break
+            # Текстовые узлы через перевод строки, как в EXTRACT_SCHEDULE_JS
+            text = '\n'.join(part.strip() for part in found[0].itertext() if part.strip())
+            if text:
+                lessons.append({'lesson_number': lesson_num, 'text': text})
+            lesson_num += 1
+
+        if lessons:
+            days.append({'container_number': day_num, 'lessons': lessons})
+        day_num += 1
+    return days
+
+
+class HttpFetcher:
+    """Пул keep-alive соединений для быстрого пути без браузера"""
+
+    def __init__(self, limit=20, timeout=15, fast_timeout=5, connect_timeout=2):
+        self.limit = limit
+        self.timeout = timeout
+        self.fast_timeout = fast_timeout            # быстрый путь: дальше уже браузер
+        self.connect_timeout = connect_timeout
+        self._session = None
+        self._csr_hosts = {}    # host -> до какого времени не пробовать HTTP (нужен JS)
+        self._down_hosts = {}   # host -> до какого времени не пробовать HTTP (сетевая ошибка)
+        self.fast_hits = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_env(cls):
+        """Создает клиент с параметрами из переменных окружения"""
+        return cls(
+            limit=int(os.getenv('HTTP_POOL_LIMIT', '20')),
+            timeout=float(os.getenv('HTTP_TIMEOUT', '15')),
+            fast_timeout=float(os.getenv('HTTP_FAST_TIMEOUT', '5')),
+            connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '2')),
+        )
+
+    def _get_session(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': 'Mozilla/5.0 (compatible; ParsAgroBot)'},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch_text(self, url, timeout=None):
+        async with self._get_session().get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            return await response.text()
+
+    async def fetch_schedule(self, group_url):
+        """Расписание по HTTP или None, если нужен Playwright"""
+        import aiohttp
+
+        host = urlsplit(group_url).netloc
+        now = time.monotonic()
+        if self._csr_hosts.get(host, 0) > now or self._down_hosts.get(host, 0) > now:
+            self.fallbacks += 1
+            return None
+
+        try:
+            html = await self.fetch_text(group_url, timeout=aiohttp.ClientTimeout(
+                total=self.fast_timeout, sock_connect=self.connect_timeout,
+            ))
+        except Exception as e:
+            # Как и с JS-страницами: какое-то время идем сразу в браузер
+            self._down_hosts[host] = time.monotonic() + NETWORK_BACKOFF_SECONDS
+            logger.warning(f"⚠️ HTTP-загрузка {group_url} не удалась, {host} без HTTP "
+                           f"{NETWORK_BACKOFF_SECONDS} с: {e!r}")
+            self.fallbacks += 1
+            return None
+
+        self._down_hosts.pop(host, None)
+
+        # Разбор lxml синхронный — уводим его из event loop
+        schedule = await asyncio.to_thread(parse_schedule_html, html)
+        if schedule is None:
+            # Сайт рендерит расписание на клиенте: какое-то время сразу идем в браузер
+            self._csr_hosts[host] = time.monotonic() + CSR_MEMORY_SECONDS
+            self.fallbacks += 1
+            logger.info(f"🌐 {host}: данные рендерятся JS, используем Playwright")
+            return None
+
+        self.fast_hits += 1
+        return schedule
+
+
+# Глобальный клиент, создается при первом обращении
+http_fetcher = None
+
+def get_http_fetcher():
+    """Возвращает общий HTTP-клиент"""
+    global http_fetcher
+    if http_fetcher is None:
+        http_fetcher = HttpFetcher.from_env()
+    return http_fetcher
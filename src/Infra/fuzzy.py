@@ -0,0 +1,97 @@
+import re
+from itertools import chain
+from collections import Counter
+
+# Латинские буквы, похожие на кириллические (после casefold)
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+})
+
+# Разделители, которые студенты ставят как попало: пробелы, дефисы, подчеркивания, точки, слэши
+SEPARATORS = re.compile(r'[\s\-‐–—_./\\]+')
+
+
+def normalize_group_name(text):
+    """Приводит название группы к канонической форме: '24Ф - Д 9.3' -> '24фд93'"""
+    return SEPARATORS.sub('', text.casefold().translate(HOMOGLYPHS))
+
+
+def bounded_levenshtein(a, b, limit):
+    """Расстояние Левенштейна или limit + 1, если оно больше limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    previous = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        current = [j]
+        row_min = j
+        for i, ca in enumerate(a, 1):
+            cost = min(
+                previous[i] + 1,
+                current[i - 1] + 1,
+                previous[i - 1] + (ca != cb),
+            )
+            current.append(cost)
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _bigrams(word):
+    return {word[i:i + 2] for i in range(len(word) - 1)}
+
+
+class FuzzyMatcher:
+    """Поиск с опечатками: фильтр по общим биграммам, затем bounded_levenshtein.
+
+    Одна правка портит не больше двух биграмм запроса, поэтому у слова на
+    расстоянии <= k есть хотя бы (биграмм запроса - 2k) общих. Точное расстояние
+    считаем только для прошедших фильтр; индекс линеен по размеру словаря.
+    """
+
+    def __init__(self, words, max_distance=2):
+        self.max_distance = max_distance
+        self.words = list(dict.fromkeys(words))
+        self.bigrams = {}       # биграмма -> id слов
+        self.by_length = {}     # длина -> id слов, для коротких запросов
+        for word_id, word in enumerate(self.words):
+            self.by_length.setdefault(len(word), []).append(word_id)
+            for gram in _bigrams(word):
+                self.bigrams.setdefault(gram, []).append(word_id)
+
+    def _limit(self, word):
+        # Для коротких названий допускаем меньше ошибок, иначе совпадет все подряд
+        return min(self.max_distance, 1 if len(word) <= 5 else 2)
+
+    def _candidates(self, word, limit):
+        grams = _bigrams(word)
+        need = len(grams) - 2 * limit
+        if need <= 0:
+            # Короткий запрос: фильтр ничего не отсекает, берем слова близкой длины
+            return [
+                word_id for length in range(len(word) - limit, len(word) + limit + 1)
+                for word_id in self.by_length.get(length, ())
+            ]
+        counts = Counter(chain.from_iterable(self.bigrams.get(gram, ()) for gram in grams))
+        return [word_id for word_id, count in counts.items() if count >= need]
+
+    def search(self, word, top_k=5):
+        """Список (слово, расстояние) по возрастанию расстояния"""
+        if not word:
+            return []
+        limit = self._limit(word)
+
+        found = []
+        for word_id in self._candidates(word, limit):
+            candidate = self.words[word_id]
+            distance = bounded_levenshtein(word, candidate, limit)
+            if distance <= limit:
+                found.append((distance, len(candidate), candidate))
+        found.sort()
+        return [(candidate, distance) for distance, _, candidate in found[:top_k]]
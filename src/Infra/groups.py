@@ -1,66 +1,306 @@
 import os
 import json
+import marshal
+import asyncio
 import logging
+from bisect import bisect_left
+from Infra.fuzzy import FuzzyMatcher, normalize_group_name
 
 logger = logging.getLogger(__name__)
 
 # Глобальная переменная для хранения данных групп
 groups_database = {}
 
-def load_groups_data():
-    """Загружает данные групп из файла"""
-    global groups_database
+# Поисковый индекс по groups_database, строится при загрузке
+group_index = None
+
+# Путь к groups_data.json (определяется один раз) и (mtime, size) загруженной версии
+groups_path = None
+loaded_signature = None
+
+# Версия формата снимка; менять при изменении GroupIndex.snapshot()
+SNAPSHOT_VERSION = 3
+
+# Максимальная длина n-грамм в индексе частичных совпадений
+NGRAM_SIZE = 3
+
+# Сколько вариантов предлагать при поиске с опечатками
+FUZZY_TOP_K = 5
+
+
+def group_number(group_url):
+    """Номер группы из хвоста URL (.../Rasp/Group/22220 -> '22220')"""
+    tail = group_url.rstrip('/').rsplit('/', 1)[-1]
+    return tail if tail.isdigit() else None
+
+
+def _ngrams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class GroupIndex:
+    """Индексы для быстрого поиска групп: по имени, номеру и подстроке"""
+
+    def __init__(self, database, ngrams=None):
+        self.database = database
+        self.names = list(database)
+        self.urls = [database[name] for name in self.names]
+        self.folded = [name.casefold() for name in self.names]
+
+        # casefold-имя -> id групп с таким именем
+        self.by_folded = {}
+        # номер группы -> id групп
+        self.by_number = {}
+        # n-грамма (длиной 1..NGRAM_SIZE) -> множество id
+        self.ngrams = {}
+        # нормализованное имя (без регистра, разделителей и латинских двойников) -> id
+        self.by_normalized = {}
+
+        for group_id, (folded, url) in enumerate(zip(self.folded, self.urls)):
+            self.by_folded.setdefault(folded, []).append(group_id)
+            number = group_number(url)
+            if number is not None:
+                self.by_number.setdefault(number, []).append(group_id)
+            if ngrams is None:
+                for size in range(1, NGRAM_SIZE + 1):
+                    for gram in _ngrams(folded, size):
+                        self.ngrams.setdefault(gram, set()).add(group_id)
+            self.by_normalized.setdefault(normalize_group_name(folded), []).append(group_id)
+
+        if ngrams is not None:
+            self.ngrams = {gram: set(ids) for gram, ids in ngrams.items()}
+        self.numbers = sorted(self.by_number)
+        self.fuzzy = FuzzyMatcher(self.by_normalized)
+
+    def snapshot(self):
+        """Индекс простыми данными: только dict/list/str/int, без объектов"""
+        return {
+            'names': self.names,
+            'urls': self.urls,
+            'ngrams': {gram: sorted(ids) for gram, ids in self.ngrams.items()},
+        }
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """Индекс из snapshot(); при несовпадении структуры — ValueError"""
+        names, urls, ngrams = data['names'], data['urls'], data['ngrams']
+        if not (
+            isinstance(names, list) and isinstance(urls, list) and len(names) == len(urls)
+            and all(isinstance(value, str) for value in names + urls)
+            and isinstance(ngrams, dict)
+        ):
+            raise ValueError("неверная структура снимка")
+        return cls(dict(zip(names, urls)), ngrams=ngrams)
+
+    def _pairs(self, ids):
+        return [(self.names[i], self.urls[i]) for i in ids]
+
+    def find_by_number(self, number):
+        """Точный номер, иначе номера, начинающиеся с запроса"""
+        if number in self.by_number:
+            return self._pairs(self.by_number[number])
+        start = bisect_left(self.numbers, number)
+        ids = []
+        for candidate in self.numbers[start:]:
+            if not candidate.startswith(number):
+                break
+            ids.extend(self.by_number[candidate])
+        return self._pairs(ids)
+
+    def find_partial(self, query):
+        """Подстрока без учета регистра, отсортированная по релевантности"""
+        folded = query.casefold()
+        if not folded:
+            return []
+
+        if len(folded) <= NGRAM_SIZE:
+            candidates = self.ngrams.get(folded, ())
+        else:
+            postings = []
+            for gram in _ngrams(folded, NGRAM_SIZE):
+                posting = self.ngrams.get(gram)
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = set.intersection(*postings)
+
+        ranked = []
+        for group_id in candidates:
+            name = self.folded[group_id]
+            position = name.find(folded)
+            if position < 0:
+                continue
+            # Полное совпадение, затем префикс, затем более ранняя позиция и короткое имя
+            ranked.append((name != folded, position, len(name), self.names[group_id], group_id))
+        ranked.sort()
+        return self._pairs(item[-1] for item in ranked)
+
+    def find_fuzzy(self, query, top_k=FUZZY_TOP_K):
+        """Совпадение после нормализации, иначе ближайшие по расстоянию правки"""
+        normalized = normalize_group_name(query)
+        if normalized in self.by_normalized:
+            return self._pairs(self.by_normalized[normalized])
+
+        ids = []
+        for word, _ in self.fuzzy.search(normalized, top_k):
+            ids.extend(self.by_normalized[word])
+        return self._pairs(ids[:top_k])
+
+def resolve_groups_path():
+    """Находит groups_data.json один раз; GROUPS_DATA_PATH задает путь явно"""
+    global groups_path
+    if groups_path is not None:
+        return groups_path
+
     possible_paths = [
+        os.getenv('GROUPS_DATA_PATH'),
         'src/groups_data.json',
-        './src/groups_data.json', 
-        f'{os.getcwd()}/src/groups_data.json',
         'groups_data.json',
-        os.path.join(os.path.dirname(__file__), 'groups_data.json'),
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'groups_data.json'),
     ]
-    
     for file_path in possible_paths:
+        if file_path and os.path.exists(file_path):
+            groups_path = os.path.abspath(file_path)
+            return groups_path
+    return None
+
+
+def _snapshot_path(source_path):
+    return os.getenv('GROUPS_SNAPSHOT_PATH') or os.path.splitext(source_path)[0] + '.bin'
+
+
+def _source_signature(source_path):
+    stat = os.stat(source_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_snapshot(source_path, signature):
+    """Готовый индекс из снимка, если он собран из этой же версии файла.
+
+    Снимок — marshal простых данных (не pickle): при загрузке не создаются
+    произвольные объекты, а сам GroupIndex пересобирается из этих данных.
+    """
+    try:
+        with open(_snapshot_path(source_path), 'rb') as f:
+            data = marshal.loads(f.read())
+        if not isinstance(data, dict):
+            raise ValueError("неверная структура снимка")
+        if (data.get('version'), data.get('signature')) != (SNAPSHOT_VERSION, list(signature)):
+            return None
+        return GroupIndex.from_snapshot(data)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"⚠️ Снимок групп поврежден, пересобираю: {e}")
+        return None
+
+
+def _write_snapshot(source_path, signature, index):
+    snapshot_path = _snapshot_path(source_path)
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(marshal.dumps({'version': SNAPSHOT_VERSION, 'signature': list(signature), **index.snapshot()}))
+        os.replace(tmp_path, snapshot_path)
+    except OSError as e:
+        logger.warning(f"⚠️ Не удалось сохранить снимок групп {snapshot_path}: {e}")
         try:
-            if os.path.exists(file_path):
-                
-                print("file_path: ", file_path)
-
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    groups_database = json.load(f)
-                logger.info(f"✅ Загружено {len(groups_database)} групп из {file_path}")
-                return
-        except Exception as e:
-            logger.warning(f"⚠️ Не удалось загрузить из {file_path}: {e}")
-            continue
-    
-    logger.error("❌ Файл groups_data.json не найден ни по одному пути!")
-    groups_database = {}
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def build_group_index(source_path):
+    """Индекс по файлу групп: из снимка или разбором JSON с сохранением снимка"""
+    signature = _source_signature(source_path)
+    index = _read_snapshot(source_path, signature)
+    if index is not None:
+        return index, signature, 'снимок'
+
+    with open(source_path, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    if not isinstance(database, dict) or not all(
+        isinstance(name, str) and isinstance(url, str) for name, url in database.items()
+    ):
+        raise ValueError("ожидается объект {название группы: URL}")
+    index = GroupIndex(database)
+    _write_snapshot(source_path, signature, index)
+    return index, signature, 'JSON'
+
+
+def _install(index, signature):
+    """Атомарная замена базы и индексов: find_group читает ссылку один раз"""
+    global groups_database, group_index, loaded_signature
+    group_index = index
+    groups_database = index.database
+    loaded_signature = signature
+
+
+def load_groups_data():
+    """Загружает данные групп из файла"""
+    source_path = resolve_groups_path()
+    if source_path is None:
+        logger.error("❌ Файл groups_data.json не найден ни по одному пути!")
+        _install(GroupIndex({}), None)
+        return
+
+    try:
+        index, signature, origin = build_group_index(source_path)
+    except Exception as e:
+        logger.error(f"❌ Не удалось загрузить {source_path}: {e}")
+        _install(GroupIndex({}), None)
+        return
+
+    _install(index, signature)
+    logger.info(f"✅ Загружено {len(index.database)} групп из {source_path} ({origin})")
+
+
+async def watch_groups_job(context):
+    """Колбэк JobQueue: сборка индекса в потоке, подмена — в event loop"""
+    source_path = resolve_groups_path()
+    if source_path is None:
+        return
+    try:
+        signature = _source_signature(source_path)
+    except OSError:
+        return
+    if signature == loaded_signature:
+        return
+
+    try:
+        index, signature, origin = await asyncio.to_thread(build_group_index, source_path)
+    except Exception as e:
+        # Битый или недописанный файл: продолжаем работать со старой базой
+        logger.warning(f"⚠️ Файл групп изменился, но не загружен: {e}")
+        return
+    _install(index, signature)
+    logger.info(f"🔄 База групп обновлена: {len(index.database)} групп ({origin})")
 
 def find_group(query):
     """Умный поиск группы по названию или номеру"""
     query = query.strip()
     
+    # Одна ссылка на индекс на весь запрос: горячая замена базы его не затронет
+    index = group_index if group_index is not None else GroupIndex(groups_database)
+    
     # 1. Точное совпадение (с учетом регистра)
-    if query in groups_database:
-        return [(query, groups_database[query])]
+    if query in index.database:
+        return [(query, index.database[query])]
     
     # 2. Поиск по номеру группы в URL
     if query.isdigit():
-        matches = []
-        for group_name, group_url in groups_database.items():
-            if query in group_url:
-                matches.append((group_name, group_url))
+        matches = index.find_by_number(query)
         if matches:
             return matches
     
     # 3. Поиск по частичному совпадению
-    matches = []
-    for group_name, group_url in groups_database.items():
-        if query in group_name:
-            matches.append((group_name, group_url))
-        elif query.lower() in group_name.lower():
-            matches.append((group_name, group_url))
+    matches = index.find_partial(query)
+    if matches:
+        return matches
     
-    return matches
+    # 4. Другие разделители, латиница вместо кириллицы, опечатки
+    return index.find_fuzzy(query)
 
 def get_groups_database():
     """Возвращает текущую базу данных групп"""
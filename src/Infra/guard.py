@@ -0,0 +1,99 @@
+import os
+import asyncio
+import logging
+from Infra.delivery import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate_limit(value):
+    """'5/60' -> (5 запросов, за 60 секунд); '0' или пусто — без лимита"""
+    if not value or value.strip() == '0':
+        return None
+    count, _, seconds = value.partition('/')
+    return int(count), float(seconds or 60)
+
+
+class RequestGuard:
+    """Один тяжелый запрос на пользователя плюс лимит частоты на пользователя.
+
+    Повторные нажатия, пока запрос выполняется, не запускают новый парсинг:
+    они присоединяются к уже идущему запросу, который и пришлет результат.
+    В чате нажатия разных пользователей объединяются, только если запрос про
+    одно и то же (scope, например URL группы); exclusive — один запрос на всех.
+    """
+
+    def __init__(self, rate_limit=(5, 60), exempt=()):
+        self.rate_limit = rate_limit
+        self.exempt = set(exempt)       # администраторы без лимита
+        self._in_flight = {}            # ('user'|'chat'|'global', ...) -> asyncio.Task
+        self._noticed = set()           # задачи, о которых уже предупредили повторным нажатием
+        self._buckets = {}              # user_id -> TokenBucket
+        self.started = 0
+        self.attached = 0
+        self.limited = 0
+
+    @classmethod
+    def from_env(cls, exempt=()):
+        return cls(
+            rate_limit=parse_rate_limit(os.getenv('HANDLER_RATE_LIMIT', '5/60')),
+            exempt=exempt,
+        )
+
+    def _bucket(self, user_id):
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) > 10000:
+                # Забываем пользователей, которые давно ничего не просили
+                self._buckets = {uid: b for uid, b in self._buckets.items() if not b.is_full()}
+            count, seconds = self.rate_limit
+            bucket = self._buckets[user_id] = TokenBucket(count / seconds, count)
+        return bucket
+
+    async def run(self, update, action, handler, scope=None, exclusive=False):
+        """Выполняет handler() или присоединяет нажатие к уже идущему запросу"""
+        user_id = update.effective_user.id
+        keys = [('user', user_id, action)]
+        if scope is not None:
+            keys.append(('chat', update.effective_chat.id, action, scope))
+        if exclusive:
+            keys.append(('global', action))
+
+        for key in keys:
+            running = self._in_flight.get(key)
+            if running is not None and not running.done():
+                self.attached += 1
+                if running not in self._noticed:
+                    self._noticed.add(running)
+                    await update.message.reply_text("⏳ Уже получаю, пришлю как только будет готово")
+                return
+
+        if self.rate_limit and user_id not in self.exempt:
+            bucket = self._bucket(user_id)
+            if not bucket.try_acquire():
+                self.limited += 1
+                logger.info("🐢 Лимит запросов", extra={'user': user_id, 'stage': 'guard'})
+                await update.message.reply_text(
+                    f"🐢 Слишком много запросов, попробуй через {bucket.retry_after():.0f} с"
+                )
+                return
+
+        task = asyncio.ensure_future(handler())
+        for key in keys:
+            self._in_flight[key] = task
+        self.started += 1
+        try:
+            return await task
+        finally:
+            for key in keys:
+                if self._in_flight.get(key) is task:
+                    del self._in_flight[key]
+            self._noticed.discard(task)
+
+    def stats(self):
+        return {
+            'in_flight': len({id(task) for task in self._in_flight.values()}),
+            'started': self.started,
+            'attached': self.attached,
+            'limited': self.limited,
+        }
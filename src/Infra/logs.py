@@ -0,0 +1,89 @@
+import os
+import queue
+import atexit
+import logging
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+
+# Структурные поля, которые можно передать через extra={...}
+STRUCTURED_FIELDS = ('user', 'group', 'stage', 'duration')
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+
+class StructuredFormatter(logging.Formatter):
+    """Добавляет к сообщению заданные структурные поля: ... | user=1 group=22296 duration=1.20s"""
+
+    def format(self, record):
+        text = super().format(record)
+        fields = []
+        for name in STRUCTURED_FIELDS:
+            value = getattr(record, name, None)
+            if value is None:
+                continue
+            if name == 'duration':
+                value = f"{value:.2f}s"
+            fields.append(f"{name}={value}")
+        return f"{text} | {' '.join(fields)}" if fields else text
+
+
+class RingBufferHandler(logging.Handler):
+    """Последние записи для /logs в кольцевом буфере фиксированного размера"""
+
+    def __init__(self, capacity=200):
+        super().__init__()
+        self.buffer = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.buffer.append(self.format(record))
+
+
+# Буфер для /logs и фоновый поток записи логов
+ring_buffer = RingBufferHandler()
+listener = None
+
+
+def setup_logging():
+    """Неблокирующее логирование: QueueHandler в коде, запись в фоновом потоке.
+
+    LOG_LEVEL задает общий уровень, LOG_LEVELS — уровни отдельных логгеров
+    (например "httpx=WARNING,Infra.sheedule=DEBUG"), LOG_BUFFER_SIZE — размер буфера /logs.
+    """
+    global listener
+    if listener is not None:
+        return listener
+
+    formatter = StructuredFormatter(LOG_FORMAT)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    ring_buffer.buffer = deque(ring_buffer.buffer, maxlen=int(os.getenv('LOG_BUFFER_SIZE', '200')))
+    ring_buffer.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    for item in os.getenv('LOG_LEVELS', 'httpx=WARNING').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    listener = QueueListener(log_queue, console, ring_buffer, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_logging)
+    return listener
+
+
+def stop_logging():
+    """Дописывает очередь и останавливает фоновый поток"""
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+
+
+def recent_logs(count=20):
+    """Последние count отформатированных записей"""
+    items = list(ring_buffer.buffer)
+    return items[-count:]
@@ -0,0 +1,203 @@
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Границы бакетов (секунды): от быстрых попаданий в кэш до медленного Chromium
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels_text(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus плюс окно последних значений для p50/p95/p99"""
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS, window=1024):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._series = {}   # значения меток -> [counts, sum, count, recent]
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0, deque(maxlen=self.window)]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+        series[3].append(value)
+
+    def percentiles(self, *label_values, points=(50, 95, 99)):
+        series = self._series.get(label_values)
+        if not series or not series[3]:
+            return None
+        ordered = sorted(series[3])
+        return {p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+    def series(self):
+        return list(self._series)
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count, _) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _labels_text(self.labels + ('le',), label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels_text(self.labels + ('le',), label_values + ('+Inf',))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _labels_text(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def items(self):
+        return list(self._values.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in self._values.items():
+            lines.append(f"{self.name}{_labels_text(self.labels, label_values)} {value}")
+        return lines
+
+
+# Длительность этапов запроса расписания
+stage_seconds = Histogram('schedule_stage_seconds', 'Длительность этапов запроса расписания', ('stage',))
+# Ошибки и таймауты этапов
+stage_failures = Counter('schedule_stage_failures_total', 'Ошибки этапов запроса расписания', ('stage', 'kind'))
+
+# Внешние источники значений (кэш, очередь отправки...): имя -> функция, возвращающая dict
+gauge_sources = {}
+
+
+def failure_kind(error):
+    return 'timeout' if isinstance(error, TimeoutError) or 'Timeout' in type(error).__name__ else 'error'
+
+
+class span:
+    """Замер этапа: with span('goto'): ... — время в гистограмму, исключения в счетчик"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_seconds.observe(time.perf_counter() - self.started, self.stage)
+        if exc is not None and not isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+            stage_failures.inc(self.stage, failure_kind(exc))
+        return False
+
+
+def observe(stage, seconds):
+    stage_seconds.observe(seconds, stage)
+
+
+def record_failure(stage, error=None, kind=None):
+    stage_failures.inc(stage, kind or failure_kind(error))
+
+
+def render_prometheus():
+    """Все метрики в текстовом формате Prometheus"""
+    lines = stage_seconds.render() + stage_failures.render()
+    for source, collect in gauge_sources.items():
+        try:
+            values = collect()
+        except Exception as e:
+            logger.warning(f"⚠️ Метрики {source} недоступны: {e}")
+            continue
+        for key, value in values.items():
+            name = f"{source}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def stats_summary():
+    """Короткая сводка для /stats"""
+    lines = ["📊 Этапы (p50 / p95 / p99, с):"]
+    for (stage,) in sorted(stage_seconds.series()):
+        p = stage_seconds.percentiles(stage)
+        lines.append(f"• {stage}: {p[50]:.2f} / {p[95]:.2f} / {p[99]:.2f} (n={stage_seconds.count(stage)})")
+    failures = sorted(stage_failures.items())
+    if failures:
+        lines.append("\n❌ Ошибки:")
+        lines.extend(f"• {stage} {kind}: {value}" for (stage, kind), value in failures)
+    for source, collect in gauge_sources.items():
+        try:
+            values = collect()
+        except Exception:
+            continue
+        lines.append(f"\n📦 {source}: " + ', '.join(f"{k}={v}" for k, v in values.items()))
+    return '\n'.join(lines)
+
+
+class MetricsServer:
+    """GET /metrics на локальном порту (METRICS_PORT, 0 — выключено)"""
+
+    def __init__(self, host='127.0.0.1', port=9100):
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            host=os.getenv('METRICS_HOST', '127.0.0.1'),
+            port=int(os.getenv('METRICS_PORT', '9100')),
+        )
+
+    async def start(self):
+        if not self.port:
+            return
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(text=render_prometheus(), content_type='text/plain', charset='utf-8')
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle_metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"📈 Метрики доступны на http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
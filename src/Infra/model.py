@@ -0,0 +1,237 @@
+import re
+import sys
+import json
+import struct
+import datetime as dt
+from dataclasses import dataclass
+
+# Разбор текста занятия. Текст приходит либо построчно (текстовые узлы через \n),
+# либо одной склеенной строкой, поэтому ищем фрагменты регулярками, а остаток — название.
+TIME_RE = re.compile(r'(\d{1,2})[:.](\d{2})\s*[-–—]\s*(\d{1,2})[:.](\d{2})')
+PAIR_RE = re.compile(r'(\d{1,2})\s*(?:-?\s*я\s*)?пара', re.IGNORECASE)
+TEACHER_RE = re.compile(
+    r'[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)?\s+(?:[А-ЯЁ]\.\s?[А-ЯЁ]\.?|[А-ЯЁ][а-яё]+\s+[А-ЯЁ][а-яё]+(?:вич|вна|чна|ична|оглы|кызы))'
+)
+ROOM_RE = re.compile(r'(?:ауд(?:итория)?\.?\s*[\w\-/]+|спортзал|с/з|дистанционно|онлайн)', re.IGNORECASE)
+# Тип занятия — только обозначения типа, а не любое слово на «пр»/«сем»/«лек»:
+# «(лек.)», «(лаб. работа)», отдельный токен «пр.»/«лаб» или строка «Лекция» целиком
+KIND_WORDS = (
+    r'лабораторная\s+работа|лаб\.\s*работа|практическое\s+занятие|лабораторная|консультация|'
+    r'лекция|практика|семинар|экзамен|зач[её]т|лекц|практ|конс|лек|лаб|пр|сем|зач|экз'
+)
+KIND_RE = re.compile(
+    rf'\(\s*(?P<bracketed>{KIND_WORDS})\.?\s*\)'
+    r'|(?<![\w.])(?P<token>лекц|практ|конс|лек|лаб|пр|сем|зач|экз)(?:\.|(?=[\s,;]|$))'
+    rf'|^[ \t]*(?P<line>{KIND_WORDS})\.?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+DATE_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+# Заголовок дня без даты: ячейка целиком — название дня недели
+WEEKDAY_TITLE_RE = re.compile(
+    r'\s*(?:понедельник|вторник|среда|четверг|пятница|суббота|воскресенье)\s*', re.IGNORECASE
+)
+
+KINDS = {
+    'лек': 'лекция',
+    'лаб': 'лабораторная',
+    'пр': 'практика',
+    'сем': 'семинар',
+    'зач': 'зачет',
+    'экз': 'экзамен',
+    'кон': 'консультация',
+}
+
+
+def kind_name(word):
+    """«лаб. работа», «практ», «Лекция» → лабораторная, практика, лекция"""
+    word = word.lower()
+    return KINDS.get(word[:3]) or KINDS[word[:2]]
+
+
+def _intern(value):
+    # Преподаватели, аудитории и предметы повторяются в тысячах занятий
+    return sys.intern(value) if value else ''
+
+
+@dataclass(slots=True)
+class Lesson:
+    number: int             # позиция в дне на странице
+    pair: int = 0           # номер пары из текста, 0 — не указан
+    start: str = ''         # 'ЧЧ:ММ'
+    end: str = ''
+    subject: str = ''
+    kind: str = ''          # лекция, практика, ...
+    teacher: str = ''
+    room: str = ''
+    text: str = ''          # исходный текст ячейки: показываем его, если разбор не удался
+
+    @property
+    def parsed(self):
+        """Разбор дал название и хотя бы одно из времени/преподавателя/аудитории"""
+        return bool(self.subject) and bool(self.start or self.teacher or self.room)
+
+    @classmethod
+    def parse(cls, number, text):
+        """Раскладывает текст ячейки на время, предмет, преподавателя, аудиторию и тип"""
+        rest = text
+        pair = start = end = teacher = room = kind = ''
+
+        found = TIME_RE.search(rest)
+        if found:
+            h1, m1, h2, m2 = found.groups()
+            start, end = f'{int(h1):02d}:{m1}', f'{int(h2):02d}:{m2}'
+            rest = rest[:found.start()] + '\n' + rest[found.end():]
+        found = PAIR_RE.search(rest)
+        if found:
+            pair = found.group(1)
+            rest = rest[:found.start()] + '\n' + rest[found.end():]
+        found = TEACHER_RE.search(rest)
+        if found:
+            teacher = found.group(0)
+            rest = rest[:found.start()] + '\n' + rest[found.end():]
+        found = ROOM_RE.search(rest)
+        if found:
+            room = ' '.join(found.group(0).split())
+            rest = rest[:found.start()] + '\n' + rest[found.end():]
+        found = KIND_RE.search(rest)
+        if found:
+            kind = kind_name(found.group('bracketed') or found.group('token') or found.group('line'))
+            rest = rest[:found.start()] + '\n' + rest[found.end():]
+
+        subject = ' '.join(part.strip(' ,;:-–') for part in rest.split('\n') if part.strip(' ,;:-–'))
+        subject = ' '.join(subject.split())
+        return cls(
+            number=number,
+            pair=int(pair) if pair else 0,
+            start=_intern(start),
+            end=_intern(end),
+            subject=_intern(subject),
+            kind=_intern(kind),
+            teacher=_intern(teacher),
+            room=_intern(room),
+            text=text,
+        )
+
+
+@dataclass(slots=True)
+class Day:
+    number: int                 # позиция дня на странице
+    lessons: tuple = ()
+    title: str = ''             # заголовок дня, например «Среда, 22.10.2025»
+    date: dt.date = None
+
+    @classmethod
+    def from_raw(cls, container):
+        """День из словаря extract_schedule/parse_schedule_html"""
+        title, day_date, lessons = '', None, []
+        for raw in container['lessons']:
+            text = raw['text']
+            found = DATE_RE.search(text)
+            # Ячейка с датой и без времени — заголовок дня, а не занятие
+            if not found and not title and WEEKDAY_TITLE_RE.fullmatch(text):
+                title = text.strip()
+                continue
+            if found and not title and not TIME_RE.search(text):
+                title = ' '.join(text.split())
+                try:
+                    day_date = dt.date(int(found.group(3)), int(found.group(2)), int(found.group(1)))
+                except ValueError:
+                    pass
+                continue
+            lessons.append(Lesson.parse(raw['lesson_number'], text))
+        return cls(number=container['container_number'], lessons=tuple(lessons), title=title, date=day_date)
+
+
+def schedule_from_raw(containers):
+    """Список дней-словарей со страницы → кортеж Day"""
+    return tuple(Day.from_raw(container) for container in containers)
+
+
+# Бинарный формат: заголовок, таблица строк, таблица дней, затем все занятия подряд.
+# Повторяющиеся предметы/преподаватели/аудитории хранятся один раз, а сплошной блок
+# занятий читается одним iter_unpack.
+MAGIC = b'SCH2'
+LEGACY_MAGIC = b'SCH1'                  # без исходного текста занятия
+_COUNT = struct.Struct('<H')
+_DAY = struct.Struct('<HIHH')           # number, date.toordinal() или 0, title, количество занятий
+_LESSON = struct.Struct('<HB7H')        # number, pair, start, end, subject, kind, teacher, room, text
+_LEGACY_LESSON = struct.Struct('<HB6H')
+
+
+def encode_schedule(schedule):
+    """Кортеж Day → bytes"""
+    strings = {'': 0}
+
+    def ref(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    days = [_COUNT.pack(len(schedule))]
+    lessons = []
+    for day in schedule:
+        days.append(_DAY.pack(day.number, day.date.toordinal() if day.date else 0, ref(day.title), len(day.lessons)))
+        for lesson in day.lessons:
+            lessons.append(_LESSON.pack(
+                lesson.number, lesson.pair,
+                ref(lesson.start), ref(lesson.end), ref(lesson.subject),
+                ref(lesson.kind), ref(lesson.teacher), ref(lesson.room), ref(lesson.text),
+            ))
+
+    table = [_COUNT.pack(len(strings))]
+    for value in strings:
+        encoded = value.encode('utf-8')
+        table.append(_COUNT.pack(len(encoded)))
+        table.append(encoded)
+    return b''.join([MAGIC] + table + days + lessons)
+
+
+def decode_schedule(payload):
+    """bytes → кортеж Day; старые JSON-снимки (str) тоже принимаются"""
+    if isinstance(payload, str):
+        return schedule_from_raw(json.loads(payload))
+    magic = bytes(payload[:len(MAGIC)])
+    if magic not in (MAGIC, LEGACY_MAGIC):
+        raise ValueError("неизвестный формат расписания")
+
+    view = memoryview(payload)
+    offset = len(MAGIC)
+    (count,) = _COUNT.unpack_from(view, offset)
+    offset += _COUNT.size
+    strings = []
+    for _ in range(count):
+        (length,) = _COUNT.unpack_from(view, offset)
+        offset += _COUNT.size
+        strings.append(_intern(str(view[offset:offset + length], 'utf-8')))
+        offset += length
+
+    (day_count,) = _COUNT.unpack_from(view, offset)
+    offset += _COUNT.size
+    day_rows = list(_DAY.iter_unpack(view[offset:offset + day_count * _DAY.size]))
+    offset += day_count * _DAY.size
+
+    if magic == MAGIC:
+        lessons = [
+            Lesson(number, pair, strings[start], strings[end], strings[subject],
+                   strings[kind], strings[teacher], strings[room], strings[text])
+            for number, pair, start, end, subject, kind, teacher, room, text
+            in _LESSON.iter_unpack(view[offset:])
+        ]
+    else:
+        lessons = [
+            Lesson(number, pair, strings[start], strings[end], strings[subject],
+                   strings[kind], strings[teacher], strings[room])
+            for number, pair, start, end, subject, kind, teacher, room
+            in _LEGACY_LESSON.iter_unpack(view[offset:])
+        ]
+
+    days = []
+    position = 0
+    for number, ordinal, title, lesson_count in day_rows:
+        days.append(Day(
+            number, tuple(lessons[position:position + lesson_count]), strings[title],
+            dt.date.fromordinal(ordinal) if ordinal else None,
+        ))
+        position += lesson_count
+    return tuple(days)
@@ -0,0 +1,85 @@
+import os
+import random
+import asyncio
+import logging
+from Infra.cache import get_schedule_cache
+from Infra.render import rendered_schedule
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulePrefetcher:
+    """Фоновое обновление расписаний всех зарегистрированных групп через JobQueue"""
+
+    def __init__(self, user_urls, loader, interval=480, jitter=0.2, min_delay=2.0, concurrency=2):
+        self.user_urls = user_urls
+        self.loader = loader
+        self.interval = interval
+        self.jitter = jitter
+        self.min_delay = min_delay
+        self.concurrency = concurrency
+        self.runs = 0
+
+    @classmethod
+    def from_env(cls, user_urls, loader):
+        """Создает планировщик с параметрами из переменных окружения"""
+        return cls(
+            user_urls,
+            loader,
+            interval=float(os.getenv('PREFETCH_INTERVAL', '480')),
+            jitter=float(os.getenv('PREFETCH_JITTER', '0.2')),
+            min_delay=float(os.getenv('PREFETCH_MIN_DELAY', '2')),
+            concurrency=int(os.getenv('PREFETCH_CONCURRENCY', '2')),
+        )
+
+    def start(self, job_queue, first=10):
+        """Ставит первый запуск в очередь задач приложения"""
+        job_queue.run_once(self._job, when=self._jittered(first), name='schedule_prefetch')
+        logger.info(f"⏰ Фоновое обновление расписаний каждые ~{self.interval:.0f} с")
+
+    def _jittered(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _job(self, context):
+        try:
+            await self.prefetch_all()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка фонового обновления: {e}")
+        finally:
+            # Каждый следующий запуск со случайным сдвигом, чтобы не бить по сайту ровными пачками
+            context.job_queue.run_once(self._job, when=self._jittered(self.interval), name='schedule_prefetch')
+
+    async def prefetch_all(self):
+        """Обновляет кэш для всех групп из user_urls с ограничением частоты запросов"""
+        # Группы из индекса регистраций, без прохода по всем пользователям
+        urls = self.user_urls.groups()
+        if not urls:
+            return
+
+        cache = get_schedule_cache()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        refreshed = 0
+
+        async def refresh(url):
+            nonlocal refreshed
+            try:
+                schedule = await cache.refresh(url, lambda: self.loader(url))
+                if schedule is not None:
+                    # Сообщения готовы заранее: нажатие кнопки — только отправка
+                    rendered_schedule(url, schedule)
+                    refreshed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось обновить {url}: {e}")
+            finally:
+                semaphore.release()
+
+        tasks = []
+        for url in urls:
+            await semaphore.acquire()
+            tasks.append(asyncio.ensure_future(refresh(url)))
+            # Не чаще одного нового запроса к сайту в min_delay секунд
+            await asyncio.sleep(self._jittered(self.min_delay))
+        await asyncio.gather(*tasks)
+
+        self.runs += 1
+        logger.info(f"🔄 Фоновое обновление: {refreshed}/{len(urls)} групп")
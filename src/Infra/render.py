@@ -0,0 +1,157 @@
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from dataclasses import dataclass
+from Infra.cache import get_schedule_cache
+from Infra.delivery import pack_messages
+from Infra.metrics import span
+
+WEEKDAYS = ('понедельник', 'вторник', 'среда', 'четверг', 'пятница', 'суббота', 'воскресенье')
+
+# Подписи выборок по дням: вид -> (сдвиг от сегодня, название)
+DAY_VIEWS = {
+    'today': (0, 'Сегодня'),
+    'tomorrow': (1, 'Завтра'),
+}
+
+
+def format_lesson(lesson):
+    """Строки занятия: время, предмет, преподаватель, аудитория"""
+    if lesson.text and not lesson.parsed:
+        # Разбор не узнал ячейку: исходный текст лучше неверно разложенных полей
+        return lesson.text
+    lines = []
+    if lesson.start:
+        lines.append(f"🕐 {lesson.start}–{lesson.end}")
+    subject = lesson.subject or "—"
+    lines.append(f"📖 {subject} ({lesson.kind})" if lesson.kind else f"📖 {subject}")
+    if lesson.teacher:
+        lines.append(f"👤 {lesson.teacher}")
+    if lesson.room:
+        lines.append(f"🚪 {lesson.room}")
+    return "\n".join(lines)
+
+
+def format_day(day):
+    """Текст одного дня: заголовок и все занятия"""
+    parts = [
+        f"📦 {day.title or f'ДЕНЬ #{day.number}'}\n"
+        f"📚 Занятий: {len(day.lessons)}"
+    ]
+    for lesson in day.lessons:
+        parts.append(
+            f"🎯 Занятие {lesson.pair or lesson.number}\n"
+            f"{'─'*20}\n"
+            f"{format_lesson(lesson)}\n"
+            f"{'─'*20}"
+        )
+    return "\n\n".join(parts)
+
+
+def day_weekday(day):
+    """День недели по дате, а если ее нет — по названию в заголовке"""
+    if day.date is not None:
+        return day.date.weekday()
+    title = day.title.lower()
+    for index, name in enumerate(WEEKDAYS):
+        if name in title:
+            return index
+    return None
+
+
+def schedule_timezone():
+    return ZoneInfo(os.getenv('SCHEDULE_TIMEZONE', 'Europe/Moscow'))
+
+
+def local_today():
+    """Сегодняшняя дата в часовом поясе университета, а не сервера"""
+    return datetime.now(schedule_timezone()).date()
+
+
+def covered_week(schedule, updated_at=None):
+    """(понедельник, воскресенье) недель, которые показывает страница.
+
+    Даты дней задают их точно. Без дат считаем, что на странице неделя,
+    в которую ее загрузили: по дню недели можно отвечать только про нее.
+    """
+    dates = [day.date for day in schedule if day.date is not None]
+    if dates:
+        first, last = min(dates), max(dates)
+    else:
+        first = last = (
+            datetime.fromtimestamp(updated_at, schedule_timezone()).date() if updated_at else local_today()
+        )
+    return first - timedelta(days=first.weekday()), last + timedelta(days=6 - last.weekday())
+
+
+@dataclass(slots=True)
+class RenderedSchedule:
+    """Готовые сообщения одной версии расписания группы"""
+    week: tuple             # вся неделя с подвалом
+    days: dict              # Day.number -> сообщения дня
+    by_date: dict           # дата -> Day.number
+    by_weekday: dict        # день недели -> Day.number, если на странице нет дат
+    covers: tuple           # (первый, последний) день недель на странице
+    updated: str            # строка «🕐 Обновлено: ...»
+
+    def messages(self, view='week', today=None):
+        """Сообщения для отправки: вся неделя или один день (today/tomorrow)"""
+        if view == 'week':
+            return self.week
+        shift, label = DAY_VIEWS[view]
+        target = (today or local_today()) + timedelta(days=shift)
+        first, last = self.covers
+        if not first <= target <= last:
+            # Например, «завтра» в воскресенье, а страница — за текущую неделю
+            return (f"🤷 {label}, {target.strftime('%d.%m')}: этой недели нет в загруженном расписании\n{self.updated}",)
+        number = self.by_date.get(target) if self.by_date else self.by_weekday.get(target.weekday())
+        if number is None:
+            return (f"🎉 {label}, {target.strftime('%d.%m')}, занятий нет\n{self.updated}",)
+        return self.days[number] + (self.updated,)
+
+
+def render_schedule(schedule, updated_at=None, stale=False):
+    """Форматирует расписание один раз: дальше отправка — только выбор готовых сообщений"""
+    with span('render'):
+        days = [day for day in schedule if day.lessons]
+        blocks = {day.number: format_day(day) for day in days}
+        total_lessons = sum(len(day.lessons) for day in days)
+
+        updated = datetime.fromtimestamp(updated_at) if updated_at else datetime.now()
+        updated_line = f"🕐 Обновлено: {updated.strftime('%d.%m.%Y %H:%M')}"
+        footer = (
+            f"{'⚠️ Сохраненное расписание, сайт сейчас недоступен' if stale else '✅ Расписание полностью загружено!'}\n"
+            f"📦 Дней занятий: {len(schedule)}\n"
+            f"🎯 Всего занятий: {total_lessons}\n"
+            f"{updated_line}\n\n"
+            f"Для обновления нажми '📅 Получить расписание'"
+        )
+
+        per_day = {number: tuple(pack_messages([block])) for number, block in blocks.items()}
+        # week — вся неделя в минимум сообщений, day — каждый день отдельно
+        if os.getenv('SCHEDULE_DELIVERY_MODE', 'week') == 'day':
+            week = tuple(message for messages in per_day.values() for message in messages) + (footer,)
+        else:
+            week = tuple(pack_messages(list(blocks.values()) + [footer]))
+
+        by_date, by_weekday = {}, {}
+        for day in days:
+            if day.date is not None:
+                by_date.setdefault(day.date, day.number)
+            weekday = day_weekday(day)
+            if weekday is not None:
+                by_weekday.setdefault(weekday, day.number)
+
+        return RenderedSchedule(
+            week=week, days=per_day, by_date=by_date, by_weekday=by_weekday,
+            covers=covered_week(schedule, updated_at),
+            updated=('⚠️ Сохраненное расписание\n' if stale else '') + updated_line,
+        )
+
+
+def rendered_schedule(group_url, schedule):
+    """Готовые сообщения для версии расписания из кэша; рендер хранится рядом с ней"""
+    cache = get_schedule_cache()
+    entry = cache.peek(group_url)
+    updated_at = entry[1] if entry is not None and entry[0] is schedule else None
+    return cache.attached(group_url, schedule, 'rendered', lambda: render_schedule(schedule, updated_at))
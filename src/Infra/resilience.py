@@ -0,0 +1,164 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from Infra.metrics import record_failure
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Сайт расписания признан недоступным, запрос не выполнялся"""
+
+
+class CircuitBreaker:
+    """closed → open после failure_threshold неудач подряд → half_open через reset_timeout"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._probe = False     # в half_open пропускаем ровно один пробный запрос
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Можно ли сейчас идти на сайт"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe:
+            self._probe = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("✅ Сайт расписания снова отвечает, прерыватель закрыт")
+        self.failures = 0
+        self.opened_at = None
+        self._probe = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probe or (self.opened_at is None and self.failures >= self.failure_threshold):
+            if self.opened_at is None:
+                self.trips += 1
+                logger.warning(
+                    f"🔌 Прерыватель открыт после {self.failures} неудач подряд, "
+                    f"пауза {self.reset_timeout} с"
+                )
+            self.opened_at = time.monotonic()
+        self._probe = False
+
+    def release(self):
+        """Пробный запрос отменен, не дойдя до результата"""
+        self._probe = False
+
+
+class ResilientLoader:
+    """Общий дедлайн, ограниченные повторы с backoff и прерыватель вокруг загрузки расписания"""
+
+    def __init__(self, breaker, deadline=25, retries=2, backoff=1.0, max_backoff=8.0):
+        self.breaker = breaker
+        self.deadline = deadline        # на весь запрос, включая повторы, с
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rejected = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            CircuitBreaker(
+                failure_threshold=int(os.getenv('BREAKER_FAILURES', '5')),
+                reset_timeout=float(os.getenv('BREAKER_RESET', '60')),
+            ),
+            deadline=float(os.getenv('SCHEDULE_DEADLINE', '25')),
+            retries=int(os.getenv('SCHEDULE_RETRIES', '2')),
+            backoff=float(os.getenv('SCHEDULE_RETRY_BACKOFF', '1.0')),
+        )
+
+    async def call(self, group_url, loader):
+        """Результат loader() или None; CircuitOpenError, если сайт сейчас не опрашиваем.
+
+        Неудача — исключение, None или дедлайн. Пустое расписание (неделя без занятий) —
+        успешная загрузка: ее не повторяют и не засчитывают прерывателю.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(group_url)
+
+        try:
+            return await self._attempts(group_url, loader)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+    async def _attempts(self, group_url, loader):
+        expires = time.monotonic() + self.deadline
+        for attempt in range(self.retries + 1):
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                # Отмена по дедлайну закрывает контекст браузера через пул
+                result = await asyncio.wait_for(loader(), timeout=remaining)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                record_failure('deadline', kind='timeout')
+                logger.warning(f"⏰ Дедлайн {self.deadline:.0f} с исчерпан",
+                               extra={'group': group_url, 'stage': 'deadline'})
+                break
+            except Exception as e:
+                record_failure('attempt', e)
+                logger.warning(f"⚠️ Попытка {attempt + 1} не удалась: {e}",
+                               extra={'group': group_url, 'stage': 'attempt'})
+                result = None
+
+            if result is not None:
+                self.breaker.record_success()
+                return result
+
+            if attempt < self.retries:
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if time.monotonic() + delay >= expires:
+                    break
+                await asyncio.sleep(delay)
+
+        self.breaker.record_failure()
+        return None
+
+    def stats(self):
+        return {
+            'open': int(self.breaker.state != CircuitBreaker.CLOSED),
+            'failures': self.breaker.failures,
+            'trips': self.breaker.trips,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+        }
+
+
+# Общий загрузчик на весь сайт расписания, создается при первом обращении
+resilient_loader = None
+
+def get_resilient_loader():
+    """Возвращает общий загрузчик с прерывателем"""
+    global resilient_loader
+    if resilient_loader is None:
+        resilient_loader = ResilientLoader.from_env()
+    return resilient_loader
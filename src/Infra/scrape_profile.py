@@ -0,0 +1,128 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Типы ресурсов, без которых расписание рендерится так же
+DEFAULT_BLOCKED_TYPES = frozenset({'image', 'media', 'font'})
+
+
+def _site_domain(host):
+    """stgau.ru для lk2.stgau.ru: поддомены университета считаем своими"""
+    parts = host.split('.')
+    return '.'.join(parts[-2:]) if len(parts) >= 2 else host
+
+
+@dataclass
+class ScrapeStats:
+    """Тайминги и статистика одного скрейпа"""
+    url: str
+    stages: dict = field(default_factory=dict)      # этап -> секунды
+    blocked: dict = field(default_factory=dict)     # причина -> количество
+    requests: int = 0
+    bytes_loaded: int = 0
+    _started: float = field(default_factory=time.perf_counter)
+
+    def mark(self, stage, started):
+        self.stages[stage] = time.perf_counter() - started
+
+    @property
+    def total(self):
+        return time.perf_counter() - self._started
+
+    def summary(self):
+        stages = ', '.join(f"{name} {seconds:.2f}с" for name, seconds in self.stages.items())
+        blocked = sum(self.blocked.values())
+        details = ', '.join(f"{reason} {count}" for reason, count in sorted(self.blocked.items()))
+        text = f"⏱ {self.total:.2f}с ({stages}); запросов {self.requests}, заблокировано {blocked}"
+        if details:
+            text += f" ({details})"
+        if self.bytes_loaded:
+            text += f", загружено {self.bytes_loaded / 1024:.0f} КБ"
+        return text
+
+
+@dataclass
+class ScrapeProfile:
+    """Настройки загрузки страницы: что блокировать и чего ждать"""
+    wait_selector: str
+    blocked_types: frozenset = DEFAULT_BLOCKED_TYPES
+    block_third_party: bool = True
+    wait_until: str = 'domcontentloaded'
+    goto_timeout: int = 30000
+    selector_timeout: int = 10000
+    debug: bool = False
+    measure_bytes: bool = False
+
+    @classmethod
+    def from_env(cls, wait_selector):
+        """Профиль из переменных окружения; SCRAPE_PROFILE=full отключает блокировки"""
+        full = os.getenv('SCRAPE_PROFILE', 'lean') == 'full'
+        blocked = os.getenv('SCRAPE_BLOCK_TYPES')
+        return cls(
+            wait_selector=os.getenv('SCRAPE_WAIT_SELECTOR', wait_selector),
+            blocked_types=frozenset() if full else (
+                frozenset(t.strip() for t in blocked.split(',') if t.strip()) if blocked is not None
+                else DEFAULT_BLOCKED_TYPES
+            ),
+            block_third_party=not full and os.getenv('SCRAPE_BLOCK_THIRD_PARTY', '1') == '1',
+            wait_until='networkidle' if full else 'domcontentloaded',
+            goto_timeout=int(os.getenv('SCRAPE_GOTO_TIMEOUT', '30000')),
+            selector_timeout=int(os.getenv('SCRAPE_SELECTOR_TIMEOUT', '10000')),
+            debug=os.getenv('SCRAPE_DEBUG', '0') == '1',
+            measure_bytes=os.getenv('SCRAPE_MEASURE_BYTES', '0') == '1',
+        )
+
+    @property
+    def intercepts(self):
+        return bool(self.blocked_types) or self.block_third_party
+
+    async def apply(self, page, url):
+        """Вешает перехват запросов и (в debug) диагностические обработчики"""
+        stats = ScrapeStats(url)
+        site = _site_domain(urlsplit(url).hostname or '')
+
+        if self.intercepts:
+            async def handle_route(route):
+                request = route.request
+                stats.requests += 1
+                if request.resource_type in self.blocked_types:
+                    reason = request.resource_type
+                elif self.block_third_party and _site_domain(urlsplit(request.url).hostname or '') != site:
+                    reason = 'third-party'
+                else:
+                    await route.continue_()
+                    return
+                stats.blocked[reason] = stats.blocked.get(reason, 0) + 1
+                await route.abort()
+
+            await page.route('**/*', handle_route)
+
+        if self.measure_bytes:
+            async def handle_finished(request):
+                try:
+                    sizes = await request.sizes()
+                    stats.bytes_loaded += sizes['responseBodySize'] + sizes['responseHeadersSize']
+                except Exception:
+                    pass
+
+            page.on("requestfinished", handle_finished)
+
+        if self.debug:
+            # Обработчик ошибок консоли
+            async def handle_console(msg):
+                if msg.type in ['error', 'warning']:
+                    logger.warning(f"🚨 Консоль {msg.type}: {msg.text}", extra={'group': url, 'stage': 'console'})
+
+            # Обработчик ошибок сети
+            async def handle_response(response):
+                if response.status >= 400:
+                    logger.warning(f"🚨 HTTP ошибка {response.status}: {response.url}", extra={'group': url, 'stage': 'network'})
+
+            page.on("console", handle_console)
+            page.on("response", handle_response)
+
+        return stats
@@ -1,9 +1,93 @@
+import os
+import time
 import asyncio
+import logging
 from datetime import datetime
 from telegram import Update
+from Infra.browser_pool import get_browser_pool
+from Infra.cache import get_schedule_cache
+from Infra.delivery import get_outbound_queue, pack_messages
+from Infra.fetcher import get_http_fetcher
+from Infra.scrape_profile import ScrapeProfile
+from Infra.changes import get_change_tracker, schedule_hashes
+from Infra.workqueue import get_scrape_queue, worker_count
+from Infra.metrics import span, observe, record_failure
+from Infra.resilience import get_resilient_loader, CircuitOpenError
+from Infra.model import schedule_from_raw
+from Infra.render import format_day, render_schedule, rendered_schedule, DAY_VIEWS
 
-async def get_schedule(update: Update, context, user_urls):
-    """Получение расписания для пользователя"""
+logger = logging.getLogger(__name__)
+
+# Корневой блок со списком дней на странице расписания
+SCHEDULE_ROOT_SELECTOR = '#page-main > div > div > div:nth-child(7) > div > div'
+
+# Обход дней и занятий внутри браузера: один IPC-вызов вместо сотен query_selector/text_content
+EXTRACT_SCHEDULE_JS = """
+(root) => {
+    const days = [];
+    for (let dayNum = 1; ; dayNum++) {
+        const daySelector = `${root} > div:nth-child(${dayNum}) > div > div`;
+        if (!document.querySelector(daySelector)) break;
+
+        const lessons = [];
+        for (let lessonNum = 1; ; lessonNum++) {
+            const lesson = document.querySelector(`${daySelector} > div:nth-child(${lessonNum})`);
+            if (!lesson) break;
+            // Текстовые узлы через перевод строки: поля занятия не склеиваются
+            const parts = [];
+            const walker = document.createTreeWalker(lesson, NodeFilter.SHOW_TEXT);
+            while (walker.nextNode()) {
+                const part = walker.currentNode.nodeValue.trim();
+                if (part) parts.push(part);
+            }
+            const text = parts.join('\n');
+            if (text) lessons.push({lesson_number: lessonNum, text: text});
+        }
+
+        if (lessons.length) days.push({container_number: dayNum, lessons: lessons});
+    }
+    return days;
+}
+"""
+
+# Первый день в контейнере: признак того, что расписание отрисовано
+SCHEDULE_READY_SELECTOR = f'{SCHEDULE_ROOT_SELECTOR} > div'
+
+# Профиль загрузки страниц, создается при первом обращении
+scrape_profile = None
+
+def get_scrape_profile():
+    """Возвращает профиль загрузки страниц из переменных окружения"""
+    global scrape_profile
+    if scrape_profile is None:
+        scrape_profile = ScrapeProfile.from_env(SCHEDULE_READY_SELECTOR)
+    return scrape_profile
+
+async def extract_schedule(page):
+    """Извлекает дни и занятия со страницы за один evaluate"""
+    return await page.evaluate(EXTRACT_SCHEDULE_JS, SCHEDULE_ROOT_SELECTOR)
+
+# user_id -> (URL группы, хэши отправленной недели или None, пока она загружается, время):
+# пуш об изменениях не шлем тому, кто уже получил эту версию целиком
+delivered_versions = {}
+DELIVERY_MEMORY_SECONDS = 600
+
+def remember_delivery(user_id, group_url, hashes):
+    now = time.monotonic()
+    if len(delivered_versions) > 10000:
+        for uid in [uid for uid, entry in delivered_versions.items() if now - entry[2] > DELIVERY_MEMORY_SECONDS]:
+            del delivered_versions[uid]
+    delivered_versions[user_id] = (group_url, hashes, now)
+
+def already_delivered(user_id, group_url, hashes):
+    """Получил ли пользователь версию hashes (или ждет загрузку, которая ее и нашла)"""
+    entry = delivered_versions.get(user_id)
+    if entry is None or entry[0] != group_url or time.monotonic() - entry[2] > DELIVERY_MEMORY_SECONDS:
+        return False
+    return entry[1] is None or entry[1] == hashes
+
+async def get_schedule(update: Update, context, user_urls, view='week'):
+    """Получение расписания для пользователя: вся неделя или один день (today/tomorrow)"""
     user = update.message.from_user
     user_id = user.id
     
@@ -17,211 +101,232 @@ async def get_schedule(update: Update, context, user_urls):
     url = user_urls[user_id]
     group_number = url.split('/')[-1]
     
-    print(f"📅 Пользователь {user_id} запросил расписание")
+    logger.info("📅 Запрос расписания", extra={'user': user_id, 'group': group_number, 'stage': 'request'})
+    started = time.perf_counter()
     status_msg = await update.message.reply_text(f"🔄 Получаю расписание...")
     
     try:
-        print("🔄 Вызов парсера...")
-        await update.message.reply_text("🔍 Запускаю парсер...")
+        cache = get_schedule_cache()
+        if cache.get(url) is None:
+            logger.debug("🔄 Вызов парсера", extra={'user': user_id, 'group': group_number})
+            await update.message.reply_text("🔍 Запускаю парсер...")
         
-        schedule_data = await parse_schedule_with_containers(url)
+        if view == 'week':
+            # Изменения, найденные загрузкой, которую ждет пользователь, придут ему в ответе
+            remember_delivery(user_id, url, None)
+        # Одна группа — один парсинг: одновременные запросы ждут общую загрузку
+        with span('load'):
+            schedule_data = await cache.get_or_load(
+                url, lambda: load_schedule(url)
+            )
+        if view == 'week':
+            # Версия, которую пользователь сейчас получит (сохраненная при недоступном сайте — не в счет)
+            if schedule_data is None:
+                delivered_versions.pop(user_id, None)
+            else:
+                remember_delivery(user_id, url, schedule_hashes(schedule_data))
         
-        if not schedule_data:
-            await status_msg.edit_text("❌ Не удалось получить расписание. Попробуй позже.")
+        if schedule_data is None:
+            # Сайт недоступен: показываем последнее удачное расписание с пометкой
+            stale = await last_known_schedule(url)
+            if stale is None:
+                record_failure('request', kind='empty')
+                await status_msg.edit_text("❌ Не удалось получить расписание. Попробуй позже.")
+                return
+            schedule_data, updated_at = stale
+            record_failure('request', kind='stale')
+            await status_msg.edit_text(
+                f"⚠️ Сайт расписания сейчас недоступен.\n"
+                f"Показываю сохраненное расписание от {datetime.fromtimestamp(updated_at).strftime('%d.%m.%Y %H:%M')}, "
+                f"оно может быть неактуальным."
+            )
+            rendered = render_schedule(schedule_data, updated_at=updated_at, stale=True)
+            with span('send'):
+                await send_messages(update, rendered.messages(view))
             return
         
-        await status_msg.edit_text(f"✅ Найдено {len(schedule_data)} дней с занятиями. Отправляю...")
+        if view == 'week' and not schedule_data:
+            await status_msg.edit_text("✅ Расписание загружено: на этой неделе занятий нет")
+        elif view == 'week':
+            await status_msg.edit_text(f"✅ Найдено {len(schedule_data)} дней с занятиями. Отправляю...")
+        else:
+            await status_msg.edit_text(f"✅ {DAY_VIEWS[view][1]}:")
         
-        await send_structured_schedule(update, group_number, schedule_data)
+        # Сообщения отрисованы один раз на версию расписания группы
+        rendered = rendered_schedule(url, schedule_data)
+        with span('send'):
+            await send_messages(update, rendered.messages(view))
+        observe('request', time.perf_counter() - started)
         
     except Exception as e:
-        print(f"Ошибка при парсинге: {e}")
+        delivered_versions.pop(user_id, None)
+        record_failure('request', e)
+        logger.error(f"Ошибка при парсинге: {e}", extra={'user': user_id, 'group': group_number})
         await update.message.reply_text("❌ Ошибка при получении расписания.")
 
+async def scrape_schedule(group_url):
+    """Один проход парсинга: в процессах-воркерах или здесь же"""
+    if worker_count() > 0:
+        # Тяжелый парсинг делают процессы-воркеры, бот только ждет результат
+        return await get_scrape_queue().request(
+            group_url, max_age=float(os.getenv('SCRAPE_SHARED_MAX_AGE', '60'))
+        )
+    return await parse_schedule_with_containers(group_url)
+
+async def load_schedule(group_url):
+    """Парсинг с учетом изменений: то, что попадает в кэш"""
+    try:
+        # Дедлайн, повторы и прерыватель: медленный сайт не копит браузеры
+        schedule = await get_resilient_loader().call(group_url, lambda: scrape_schedule(group_url))
+    except CircuitOpenError:
+        logger.info("🔌 Сайт недоступен, парсинг пропущен", extra={'group': group_url, 'stage': 'breaker'})
+        return None
+    if schedule is not None:
+        await get_change_tracker().record(group_url, schedule)
+    return schedule
+
+async def last_known_schedule(group_url):
+    """Последнее удачное расписание группы: (schedule, updated_at) или None"""
+    cached = get_schedule_cache().peek(group_url)
+    if cached is not None:
+        return cached
+    snapshot = await asyncio.to_thread(get_change_tracker().store.load, group_url)
+    if snapshot is None:
+        return None
+    schedule, _, updated_at = snapshot
+    return schedule, updated_at
+
 async def parse_schedule_with_containers(group_url):
-    """Парсинг расписания с использованием Playwright"""
-    from playwright.async_api import async_playwright
+    """Парсинг расписания: сначала быстрый HTTP, Playwright — только если нужен JS"""
+    if os.getenv('SCHEDULE_HTTP_FAST_PATH', '1') == '1':
+        with span('http'):
+            schedule = await get_http_fetcher().fetch_schedule(group_url)
+        if schedule is not None:
+            logger.info(f"⚡ ПАРСЕР: HTTP без браузера, {len(schedule)} контейнеров",
+                        extra={'group': group_url, 'stage': 'http'})
+            return schedule_from_raw(schedule)
     
-    print(f"🔄 ПАРСЕР: Начало для {group_url}")
+    schedule = await parse_schedule_with_browser(group_url)
+    # Дальше по конвейеру (кэш, снимки, воркеры) идут только Day/Lesson
+    return schedule_from_raw(schedule) if schedule is not None else None
+
+async def parse_schedule_with_browser(group_url, profile=None):
+    """Парсинг расписания с использованием Playwright"""
+    profile = profile or get_scrape_profile()
+    logger.debug("🔄 ПАРСЕР: Начало", extra={'group': group_url, 'stage': 'browser'})
     
     try:
-        print("1. Импорт Playwright...")
-        
-        async with async_playwright() as p:
-            print("2. Запуск браузера...")
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            print("✅ Браузер запущен")
-            
-            print("3. Создание страницы...")
-            page = await browser.new_page()
-            print("✅ Страница создана")
-            
-            # Добавляем обработчик ошибок консоли
-            async def handle_console(msg):
-                if msg.type in ['error', 'warning']:
-                    print(f"🚨 Консоль {msg.type}: {msg.text}")
-            
-            # Добавляем обработчик ошибок сети
-            async def handle_response(response):
-                if response.status >= 400:
-                    print(f"🚨 HTTP ошибка {response.status}: {response.url}")
+        started = time.perf_counter()
+        async with get_browser_pool().page() as page:
+            stats = await profile.apply(page, group_url)
+            stats.mark('page', started)
             
-            page.on("console", handle_console)
-            page.on("response", handle_response)
+            started = time.perf_counter()
+            response = await page.goto(group_url, wait_until=profile.wait_until, timeout=profile.goto_timeout)
+            stats.mark('goto', started)
+            logger.debug(f"✅ Страница загружена. Status: {response.status if response else '-'}",
+                         extra={'group': group_url, 'stage': 'goto', 'duration': stats.stages['goto']})
             
-            print(f"4. Переход по URL: {group_url}")
-            response = await page.goto(group_url, wait_until='networkidle', timeout=60000)
-            print(f"✅ Страница загружена. Status: {response.status}")
-            
-            # Ждем дополнительно для выполнения JavaScript
-            print("⏳ Ожидание выполнения JavaScript...")
+            # Ждем сам контейнер расписания, а не тишину в сети
+            started = time.perf_counter()
             try:
-                # Пытаемся дождаться появления основного контента
-                await page.wait_for_selector('.box-limiter div', timeout=10000)
-                print("✅ Основной контент загружен")
-            except:
-                print("⚠️ Основной контент не найден, ждем 3 секунды...")
-                await page.wait_for_timeout(3000)
-            
-            title = await page.title()
-            print(f"✅ Title страницы: {title}")
+                await page.wait_for_selector(profile.wait_selector, timeout=profile.selector_timeout)
+            except Exception:
+                record_failure('wait', kind='timeout')
+                # Нет даже корня расписания: страница не отрисовалась, это неудача, а не пустая неделя
+                if await page.query_selector(SCHEDULE_ROOT_SELECTOR) is None:
+                    logger.warning("⚠️ Расписание на странице не отрисовалось",
+                                   extra={'group': group_url, 'stage': 'wait'})
+                    return None
+                logger.warning("⚠️ Дни расписания не появились, разбираем то, что есть",
+                               extra={'group': group_url, 'stage': 'wait'})
+            stats.mark('wait', started)
             
-            # Проверяем, есть ли контент на странице
-            body_text = await page.text_content('body')
-            print(f"📄 Длина контента body: {len(body_text)} символов")
+            if profile.debug:
+                title = await page.title()
+                body_text = await page.text_content('body')
+                logger.debug(f"✅ Title страницы: {title}, длина body: {len(body_text)} символов",
+                             extra={'group': group_url})
             
-            # Упрощенный парсинг для теста
-            all_containers = []
-            container_num = 1
+            # Весь разбор выполняется одним вызовом внутри страницы
+            started = time.perf_counter()
+            all_containers = await extract_schedule(page)
+            stats.mark('extract', started)
             
-            while container_num <= 10:  # Ограничим для теста
-                container_selector = f'#page-main > div > div > div:nth-child(7) > div > div > div:nth-child({container_num}) > div > div'
-                container = await page.query_selector(container_selector)
-                
-                if not container:
-                    break
-                
-                container_data = {
-                    'container_number': container_num,
-                    'lessons': []
-                }
-                
-                lesson_num = 1
-                while lesson_num <= 10:
-                    lesson_selector = f'{container_selector} > div:nth-child({lesson_num})'
-                    lesson_element = await page.query_selector(lesson_selector)
-                    
-                    if not lesson_element:
-                        break
-                    
-                    text = await lesson_element.text_content()
-                    if text and text.strip():
-                        container_data['lessons'].append({
-                            'lesson_number': lesson_num,
-                            'text': text.strip()
-                        })
-                    
-                    lesson_num += 1
-                
-                if container_data['lessons']:
-                    all_containers.append(container_data)
-                    print(f"✅ Контейнер {container_num}: {len(container_data['lessons'])} занятий")
-                
-                container_num += 1
-            
-            await browser.close()
-            print(f"🎉 ПАРСЕР: Найдено {len(all_containers)} контейнеров")
+            logger.info(f"🎉 ПАРСЕР: Найдено {len(all_containers)} контейнеров. {stats.summary()}",
+                        extra={'group': group_url, 'stage': 'browser', 'duration': stats.total})
+            for stage, seconds in stats.stages.items():
+                observe(stage, seconds)
+            observe('browser', stats.total)
             return all_containers
             
     except Exception as e:
-        print(f"💥 ПАРСЕР: Ошибка: {str(e)}")
-        import traceback
-        print(f"💥 Traceback: {traceback.format_exc()}")
+        record_failure('browser', e)
+        logger.exception(f"💥 ПАРСЕР: Ошибка: {e}", extra={'group': group_url, 'stage': 'browser'})
         return None
 
-async def send_structured_schedule(update: Update, group_name: str, schedule_data: list):
-    """Отправка структурированного расписания пользователю"""
-    total_lessons = sum(len(container['lessons']) for container in schedule_data)
+async def send_messages(update: Update, messages):
+    """Отправка готовых сообщений через общую очередь"""
+    queue = get_outbound_queue()
+    chat_id = update.effective_chat.id
+    for message in messages:
+        await queue.send(update.get_bot(), chat_id, message)
+
+def format_changes(diff):
+    """Компактное сообщение только об изменившихся днях"""
+    blocks = ["🔔 Расписание изменилось!"]
+    for day in diff['added']:
+        blocks.append("🆕 " + format_day(day))
+    for day in diff['changed']:
+        blocks.append("✏️ " + format_day(day))
+    for key in diff['removed']:
+        # Ключ дня — дата в ISO или номер дня на странице
+        label = datetime.strptime(key, '%Y-%m-%d').strftime('%d.%m.%Y') if isinstance(key, str) else f"ДЕНЬ #{key}"
+        blocks.append(f"🗑 {label} убран из расписания")
+    return pack_messages(blocks)
+
+async def push_schedule_changes(bot, user_urls, group_url, diff):
+    """Рассылка изменений всем, кто зарегистрирован на группу"""
+    messages = format_changes(diff)
+    queue = get_outbound_queue()
     
-    for container in schedule_data:
-        Day_num = container['container_number']
-        lessons = container['lessons']
-        
-        if not lessons:
-            continue
-        
-        container_header = (
-            f"📦 ДЕНЬ #{Day_num}\n"
-            f"📚 Занятий: {len(lessons)}\n"
-        )
-        await update.message.reply_text(container_header)
-        
-        for lesson in lessons:
-            lesson_num = lesson['lesson_number']
-            lesson_text = lesson['text']
-            
-            lesson_message = (
-                f"🎯 Занятие {lesson_num}\n"
-                f"{'─'*20}\n"
-                f"{lesson_text}\n"
-                f"{'─'*20}"
-            )
-            
-            await update.message.reply_text(lesson_message)
-            await asyncio.sleep(0.2)
-        
-        await asyncio.sleep(0.3)
+    async def notify(user_id):
+        try:
+            for message in messages:
+                await queue.send(bot, user_id, message)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось уведомить: {e}", extra={'user': user_id, 'group': group_url})
     
-    await update.message.reply_text(
-        f"✅ Расписание полностью загружено!\n"
-        f"📦 Дней занятий: {len(schedule_data)}\n"
-        f"🎯 Всего занятий: {total_lessons}\n"
-        f"🕐 Обновлено: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
-        f"Для обновления нажми '📅 Получить расписание'"
-    )
+    # Кому уже отправлена эта версия недели, пуш не нужен; получившим старую — нужен
+    current = get_change_tracker().current(group_url)
+    users = [
+        user_id for user_id in user_urls.users_for(group_url)
+        if not already_delivered(user_id, group_url, current)
+    ]
+    await asyncio.gather(*(notify(user_id) for user_id in users))
+    logger.info(f"🔔 Изменения отправлены {len(users)} пользователям", extra={'group': group_url, 'stage': 'notify'})
 
 async def test_playwright(update: Update, context):
     """Тестовая команда для проверки парсера"""
     try:
-        print("🧪 ЗАПУСК ТЕСТА PLAYWRIGHT")
+        logger.info("🧪 ЗАПУСК ТЕСТА PLAYWRIGHT", extra={'user': update.effective_user.id})
         await update.message.reply_text("🧪 Запускаю тест Playwright...")
         
-        from playwright.async_api import async_playwright
+        await update.message.reply_text("1. 🚀 Получение страницы из пула браузеров...")
         
-        async with async_playwright() as p:
-            print("1. Запуск браузера...")
-            await update.message.reply_text("1. 🚀 Запуск браузера...")
-            
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            print("✅ Браузер запущен")
-            await update.message.reply_text("✅ Браузер запущен")
-            
-            print("2. Создание страницы...")
-            await update.message.reply_text("2. 📄 Создание страницы...")
-            page = await browser.new_page()
-            print("✅ Страница создана")
+        async with get_browser_pool().page() as page:
             await update.message.reply_text("✅ Страница создана")
             
-            print("3. Переход на Google...")
-            await update.message.reply_text("3. 🌐 Переход на Google...")
+            await update.message.reply_text("2. 🌐 Переход на Google...")
             await page.goto('https://www.google.com', timeout=30000)
-            print("✅ Google загружен")
             await update.message.reply_text("✅ Google загружен")
             
             title = await page.title()
-            print(f"✅ Title страницы: {title}")
             await update.message.reply_text(f"✅ Title страницы: {title}")
             
-            await browser.close()
-            print("🎉 ТЕСТ УСПЕШЕН - Playwright работает!")
+            logger.info("🎉 ТЕСТ УСПЕШЕН - Playwright работает!")
             await update.message.reply_text("🎉 ТЕСТ УСПЕШЕН! Playwright работает корректно!")
             
     except Exception as e:
-        print(f"💥 ТЕСТ ПРОВАЛЕН: {e}")
+        logger.error(f"💥 ТЕСТ ПРОВАЛЕН: {e}")
         await update.message.reply_text(f"❌ ТЕСТ ПРОВАЛЕН: {str(e)}")
@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections.abc import MutableMapping
+from Infra.model import encode_schedule, decode_schedule
+
+logger = logging.getLogger(__name__)
+
+# Маркер удаления в буфере записей
+_DELETED = object()
+
+
+def open_database(path):
+    """Соединение с SQLite в режиме WAL: читатели не блокируют писателя"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # timeout = busy_timeout: несколько процессов могут писать в одну базу
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class UserRegistry(MutableMapping):
+    """Постоянное хранилище user_id -> URL группы (SQLite WAL) с кэшем в памяти.
+
+    Ведет себя как dict: чтение из памяти за O(1), запись копится в буфере
+    и сбрасывается в базу пачками.
+    """
+
+    def __init__(self, path='data/users.db', batch_size=50):
+        self.path = path
+        self.batch_size = batch_size
+        self._conn = None
+        self._loaded = False
+        self._users = {}        # user_id -> group_url
+        self._by_group = {}     # group_url -> set(user_id)
+        self._pending = {}      # user_id -> group_url | _DELETED
+        self._lock = threading.Lock()           # соединение с базой
+        self._pending_lock = threading.Lock()   # буфер: его меняют event loop и поток сброса
+        self._flush_task = None
+
+    @classmethod
+    def from_env(cls):
+        """Создает хранилище с параметрами из переменных окружения"""
+        return cls(
+            path=os.getenv('USERS_DB_PATH', 'data/users.db'),
+            batch_size=int(os.getenv('USERS_DB_BATCH', '50')),
+        )
+
+    def _connection(self):
+        if self._conn is None:
+            conn = open_database(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_groups ("
+                " user_id INTEGER PRIMARY KEY,"
+                " group_url TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_user_groups_url ON user_groups(group_url)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _ensure_loaded(self):
+        """Ленивая загрузка всех регистраций при первом обращении"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rows = self._connection().execute("SELECT user_id, group_url FROM user_groups").fetchall()
+            for user_id, group_url in rows:
+                if user_id not in self._pending:
+                    self._remember(user_id, group_url)
+            self._loaded = True
+        logger.info(f"✅ Загружено {len(rows)} регистраций из {self.path}")
+
+    def _remember(self, user_id, group_url):
+        old_url = self._users.get(user_id)
+        if old_url is not None:
+            self._by_group.get(old_url, set()).discard(user_id)
+        self._users[user_id] = group_url
+        self._by_group.setdefault(group_url, set()).add(user_id)
+
+    def _forget(self, user_id):
+        old_url = self._users.pop(user_id, None)
+        if old_url is not None:
+            self._by_group.get(old_url, set()).discard(user_id)
+
+    def _read_through(self, user_id):
+        """Промах в памяти: регистрацию мог добавить другой процесс"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT group_url FROM user_groups WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        self._remember(user_id, row[0])
+        return row[0]
+
+    def __getitem__(self, user_id):
+        self._ensure_loaded()
+        group_url = self._users.get(user_id)
+        if group_url is None and user_id not in self._pending:
+            group_url = self._read_through(user_id)
+        if group_url is None:
+            raise KeyError(user_id)
+        return group_url
+
+    def __contains__(self, user_id):
+        try:
+            self[user_id]
+        except KeyError:
+            return False
+        return True
+
+    def __setitem__(self, user_id, group_url):
+        self._ensure_loaded()
+        self._remember(user_id, group_url)
+        with self._pending_lock:
+            self._pending[user_id] = group_url
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._schedule_flush()
+
+    def __delitem__(self, user_id):
+        self._ensure_loaded()
+        if user_id not in self._users:
+            raise KeyError(user_id)
+        self._forget(user_id)
+        with self._pending_lock:
+            self._pending[user_id] = _DELETED
+
+    def _schedule_flush(self):
+        """Полный буфер сбрасывается в фоне: запись в базу не блокирует event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне event loop (скрипты, миграция) пишем сразу
+            self.flush_sync()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return iter(list(self._users))
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._users)
+
+    def users_for(self, group_url):
+        """Пользователи, зарегистрированные на группу"""
+        self._ensure_loaded()
+        return set(self._by_group.get(group_url, ()))
+
+    def groups(self):
+        """Все группы, на которые есть хотя бы одна регистрация"""
+        self._ensure_loaded()
+        return [url for url, users in self._by_group.items() if users]
+
+    def flush_sync(self):
+        """Записывает накопленные изменения одной транзакцией"""
+        with self._lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+            now = time.time()
+            upserts = [(uid, url, now) for uid, url in pending.items() if url is not _DELETED]
+            deletes = [(uid,) for uid, url in pending.items() if url is _DELETED]
+            conn = self._connection()
+            try:
+                with conn:
+                    if upserts:
+                        conn.executemany(
+                            "INSERT INTO user_groups (user_id, group_url, updated_at) VALUES (?, ?, ?) "
+                            "ON CONFLICT(user_id) DO UPDATE SET group_url = excluded.group_url, "
+                            "updated_at = excluded.updated_at",
+                            upserts
+                        )
+                    if deletes:
+                        conn.executemany("DELETE FROM user_groups WHERE user_id = ?", deletes)
+            except sqlite3.Error as e:
+                # Возвращаем записи в буфер, чтобы не потерять их
+                with self._pending_lock:
+                    for uid, url in pending.items():
+                        self._pending.setdefault(uid, url)
+                logger.error(f"❌ Не удалось сохранить регистрации: {e}")
+                return 0
+            return len(pending)
+
+    async def flush(self):
+        """Асинхронный сброс буфера без блокировки event loop"""
+        return await asyncio.to_thread(self.flush_sync)
+
+    async def flush_job(self, context):
+        """Колбэк для JobQueue"""
+        written = await self.flush()
+        if written:
+            logger.info(f"💾 Сохранено {written} регистраций")
+
+    def close(self):
+        self.flush_sync()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SnapshotStore:
+    """Последнее разобранное расписание каждой группы и хэши его дней"""
+
+    def __init__(self, path='data/users.db'):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(path=os.getenv('USERS_DB_PATH', 'data/users.db'))
+
+    def _connection(self):
+        if self._conn is None:
+            conn = open_database(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schedule_snapshots ("
+                " group_url TEXT PRIMARY KEY,"
+                " payload BLOB NOT NULL,"
+                " hashes TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def load(self, group_url):
+        """(расписание, {номер дня: хэш} или None для старого JSON-снимка, время) или None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload, hashes, updated_at FROM schedule_snapshots WHERE group_url = ?",
+                (group_url,)
+            ).fetchone()
+        if row is None:
+            return None
+        payload, hashes, updated_at = row
+        if isinstance(payload, str):
+            # Снимок до перехода на Day/Lesson: хэши считались иначе, сравнивать не с чем
+            return decode_schedule(payload), None, updated_at
+        return decode_schedule(payload), {(int(k) if k.isdigit() else k): v for k, v in json.loads(hashes).items()}, updated_at
+
+    def save(self, group_url, schedule, hashes):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO schedule_snapshots (group_url, payload, hashes, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(group_url) DO UPDATE SET payload = excluded.payload, "
+                    "hashes = excluded.hashes, updated_at = excluded.updated_at",
+                    (group_url, encode_schedule(schedule), json.dumps(hashes), time.time())
+                )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,153 @@
+import os
+import hmac
+import signal
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Заголовок, в котором Telegram присылает secret_token из setWebhook
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookServer:
+    """Прием обновлений Telegram через aiohttp вместо long polling"""
+
+    def __init__(self, application, secret_token, webhook_url=None, path='/telegram',
+                 host='0.0.0.0', port=5000, workers=8, queue_size=1000):
+        self.application = application
+        self.secret_token = secret_token
+        self.webhook_url = webhook_url
+        self.path = path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self._tasks = []
+
+    @classmethod
+    def from_env(cls, application):
+        """Создает сервер с параметрами из переменных окружения"""
+        secret_token = os.getenv('WEBHOOK_SECRET')
+        if not secret_token:
+            raise ValueError("❌ WEBHOOK_SECRET не задан!")
+        return cls(
+            application,
+            secret_token=secret_token,
+            webhook_url=os.getenv('WEBHOOK_URL'),
+            path=os.getenv('WEBHOOK_PATH', '/telegram'),
+            host=os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+            port=int(os.getenv('WEBHOOK_PORT', '5000')),
+            workers=int(os.getenv('WEBHOOK_WORKERS', '8')),
+            queue_size=int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000')),
+        )
+
+    def make_app(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get('/health', self.handle_health)
+        return app
+
+    async def handle_update(self, request):
+        from aiohttp import web
+        from telegram import Update
+
+        token = request.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token, self.secret_token):
+            self.rejected += 1
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            logger.warning(f"⚠️ Некорректное обновление: {e}")
+            return web.Response(status=400)
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # Telegram повторит доставку позже
+            return web.Response(status=503)
+        self.received += 1
+        return web.Response(status=200)
+
+    async def handle_health(self, request):
+        from aiohttp import web
+
+        return web.json_response({
+            'status': 'ok',
+            'queue': self.queue.qsize(),
+            'workers': self.workers,
+            'received': self.received,
+            'processed': self.processed,
+            'rejected': self.rejected,
+        })
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.application.process_update(update)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработки обновления: {e}")
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+
+    async def run(self):
+        """Запускает приложение, регистрирует вебхук и обслуживает HTTP до сигнала остановки"""
+        from aiohttp import web
+
+        application = self.application
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+
+        if self.webhook_url:
+            await application.bot.set_webhook(
+                url=self.webhook_url.rstrip('/') + self.path,
+                secret_token=self.secret_token,
+                max_connections=self.workers,
+            )
+            logger.info(f"🔗 Вебхук зарегистрирован: {self.webhook_url}")
+
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        logger.info(f"🌍 Вебхук-сервер слушает {self.host}:{self.port}{self.path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+
+        try:
+            await stop.wait()
+        finally:
+            await runner.cleanup()
+            # Дорабатываем уже принятые обновления
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout=10)
+            except asyncio.TimeoutError:
+                pass
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+            await application.shutdown()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
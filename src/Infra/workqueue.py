@@ -0,0 +1,170 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from Infra.storage import open_database
+from Infra.model import encode_schedule, decode_schedule
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeQueue:
+    """Общая очередь задач парсинга на SQLite для бота и процессов-воркеров.
+
+    Бот кладет URL группы в scrape_jobs, воркер забирает задачу и пишет
+    результат в scrape_results — это общий для всех процессов кэш.
+    """
+
+    def __init__(self, path='data/jobs.db', lease=120, poll_interval=0.2):
+        self.path = path
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Создает очередь с параметрами из переменных окружения"""
+        return cls(
+            path=os.getenv('SCRAPE_QUEUE_PATH', 'data/jobs.db'),
+            lease=float(os.getenv('SCRAPE_JOB_LEASE', '120')),
+        )
+
+    def _connection(self):
+        if self._conn is None:
+            conn = open_database(self.path)
+            conn.isolation_level = None     # транзакции открываем сами
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrape_jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " group_url TEXT NOT NULL UNIQUE,"
+                " status TEXT NOT NULL DEFAULT 'pending',"
+                " worker TEXT,"
+                " enqueued_at REAL NOT NULL,"
+                " started_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_jobs_status ON scrape_jobs(status, id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrape_results ("
+                " group_url TEXT PRIMARY KEY,"
+                " payload BLOB,"
+                " error TEXT,"
+                " finished_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, group_url):
+        """Добавляет задачу; повторная задача на тот же URL не создается"""
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR IGNORE INTO scrape_jobs (group_url, enqueued_at) VALUES (?, ?)",
+                (group_url, time.time())
+            )
+
+    def claim(self, worker):
+        """Атомарно забирает самую старую задачу (или брошенную упавшим воркером)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, group_url FROM scrape_jobs "
+                    "WHERE status = 'pending' OR (status = 'running' AND started_at < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (time.time() - self.lease,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE scrape_jobs SET status = 'running', worker = ?, started_at = ? WHERE id = ?",
+                        (worker, time.time(), row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return row
+
+    def complete(self, job_id, group_url, schedule=None, error=None):
+        """Публикует результат и удаляет задачу"""
+        # Компактный бинарный формат: воркер и бот обмениваются Day/Lesson без JSON
+        payload = encode_schedule(schedule) if schedule is not None else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO scrape_results (group_url, payload, error, finished_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(group_url) DO UPDATE SET payload = COALESCE(excluded.payload, payload), "
+                    "error = excluded.error, finished_at = excluded.finished_at",
+                    (group_url, payload, error, time.time())
+                )
+                conn.execute("DELETE FROM scrape_jobs WHERE id = ?", (job_id,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def result(self, group_url, since):
+        """(расписание, ошибка), если результат появился не раньше since, иначе None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload, error, finished_at FROM scrape_results WHERE group_url = ?",
+                (group_url,)
+            ).fetchone()
+        if row is None or row[2] < since:
+            return None
+        payload, error, _ = row
+        # При ошибке старый payload сохраняется, но это не свежий результат
+        return (None if error else decode_schedule(payload) if payload is not None else None), error
+
+    def pending(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM scrape_jobs").fetchone()[0]
+
+    async def request(self, group_url, max_age=0, timeout=90):
+        """Расписание из общего кэша (не старше max_age) или через воркеров"""
+        now = time.time()
+        if max_age:
+            cached = await asyncio.to_thread(self.result, group_url, now - max_age)
+            if cached is not None and cached[0] is not None:
+                return cached[0]
+
+        await asyncio.to_thread(self.enqueue, group_url)
+        deadline = now + timeout
+        while time.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            found = await asyncio.to_thread(self.result, group_url, now)
+            if found is not None:
+                schedule, error = found
+                if error:
+                    logger.warning(f"⚠️ Воркер не смог разобрать {group_url}: {error}")
+                return schedule
+        logger.warning(f"⏳ Таймаут ожидания воркеров для {group_url}")
+        return None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def worker_count():
+    """SCRAPER_WORKERS: число процессов-воркеров, 'auto' — по числу ядер, 0 — парсить в боте"""
+    value = os.getenv('SCRAPER_WORKERS', '0')
+    if value == 'auto':
+        return os.cpu_count() or 1
+    return int(value)
+
+
+# Глобальная очередь, создается при первом обращении
+scrape_queue = None
+
+def get_scrape_queue():
+    """Возвращает общую очередь задач парсинга"""
+    global scrape_queue
+    if scrape_queue is None:
+        scrape_queue = ScrapeQueue.from_env()
+    return scrape_queue
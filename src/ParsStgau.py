@@ -2,12 +2,28 @@ import os
 import asyncio
 import logging
 import json
+import functools
 from datetime import datetime
 from dotenv import load_dotenv
 from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
-from Infra.groups import load_groups_data, find_group, get_groups_database
-from Infra.sheedule import get_schedule, test_playwright
+from Infra.groups import load_groups_data, find_group, get_groups_database, watch_groups_job
+from Infra.fuzzy import normalize_group_name
+from Infra.sheedule import get_schedule, test_playwright, load_schedule, push_schedule_changes
+from Infra.browser_pool import get_browser_pool
+from Infra.cache import get_schedule_cache
+from Infra.prefetch import SchedulePrefetcher
+from Infra.storage import UserRegistry
+from Infra.delivery import get_outbound_queue
+from Infra.fetcher import get_http_fetcher
+from Infra.changes import get_change_tracker
+from Infra.workqueue import get_scrape_queue, worker_count
+from Infra.webhook import WebhookServer
+from Infra.logs import setup_logging, recent_logs
+from Infra.metrics import MetricsServer, gauge_sources, stats_summary
+from Infra.resilience import get_resilient_loader
+from Infra.guard import RequestGuard
+from worker import start_workers, stop_workers
 
 # Загрузка переменных окружения ДО использования
 load_dotenv(".env.txt")
@@ -15,31 +31,28 @@ TOKEN = os.getenv('BOT_TOKEN')
 if not TOKEN:
     raise ValueError("❌ TOKEN не найден!")
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-user_urls = {}
+# Telegram id администраторов через запятую
+ADMIN_IDS = {int(x) for x in os.getenv('ADMIN_IDS', '').split(',') if x.strip()}
 
-# Глобальная переменная для хранения последних логов
-bot_logs = []
+# Регистрации user_id -> URL группы, переживают перезапуск
+user_urls = UserRegistry.from_env()
 
-class TelegramLogHandler(logging.Handler):
-    """Кастомный обработчик логов для отправки в Telegram"""
-    def __init__(self, bot=None):
-        super().__init__()
-        self.bot = bot
-        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    
-    def emit(self, record):
-        global bot_logs
-        log_entry = self.format(record)
-        
-        # Сохраняем лог в глобальный список
-        bot_logs.append(log_entry)
-        
-        # Ограничиваем размер логов (последние 50 записей)
-        if len(bot_logs) > 50:
-            bot_logs = bot_logs[-50:]
+# Повторные нажатия присоединяются к идущему запросу; лимит HANDLER_RATE_LIMIT на пользователя
+request_guard = RequestGuard.from_env(exempt=ADMIN_IDS)
+
+
+def admin_only(handler):
+    """Команда только для ADMIN_IDS"""
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if update.effective_user.id not in ADMIN_IDS:
+            await update.message.reply_text("⛔ Команда доступна только администраторам")
+            return
+        return await handler(update, context)
+    return wrapper
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -54,8 +67,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/reg ИСП-21-1\n"
         "/reg 22296\n"
         "/reg ПРОГ-20-1\n\n"
-        "2. Получай расписание кнопкой ниже!\n\n"
-        "📋 Новые команды:\n"
+        "2. Получай расписание кнопкой ниже!\n"
+        "/today и /tomorrow — только на сегодня или завтра\n\n"
+        "📋 Для администраторов:\n"
         "/logs - посмотреть логи работы\n"
         "/test - тест парсера\n\n"
         "По всем вопросам: @Pro100_4elovek19"
@@ -63,7 +77,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     reply_markup = ReplyKeyboardMarkup([
         ["🎯 Зарегистрировать группу"],
-        ["📅 Получить расписание", "❓ Помощь"]
+        ["📅 Получить расписание", "❓ Помощь"],
+        ["📆 Сегодня", "📆 Завтра"]
     ], resize_keyboard=True)
     
     await update.message.reply_text(
@@ -71,17 +86,23 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         reply_markup=reply_markup
     )
 
+@admin_only
 async def show_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать логи бота"""
     user = update.message.from_user
     
-    if not bot_logs:
+    # Берем последние 20 записей
+    logs = recent_logs(20)
+    if not logs:
         await update.message.reply_text("📭 Логи пока пусты...")
         return
     
-    # Берем последние 20 записей
-    recent_logs = bot_logs[-20:]
-    logs_text = "📋 **Последние логи бота:**\n\n" + "\n".join(recent_logs)
+    cache_stats = get_schedule_cache().stats()
+    logs_text = (
+        "📋 **Последние логи бота:**\n\n" + "\n".join(logs) +
+        f"\n\n📦 Кэш: {cache_stats['size']} групп, попаданий {cache_stats['hits']}, "
+        f"промахов {cache_stats['misses']}, объединено {cache_stats['coalesced']}"
+    )
     
     # Разбиваем на части если слишком длинное сообщение
     if len(logs_text) > 4000:
@@ -89,6 +110,32 @@ async def show_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await update.message.reply_text(f"```\n{logs_text}\n```", parse_mode='MarkdownV2')
 
+@admin_only
+async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Сводка метрик для администраторов"""
+    await update.message.reply_text(stats_summary())
+
+@admin_only
+async def run_test(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Тест Playwright: целый браузер, поэтому только администраторам и не параллельно"""
+    await request_guard.run(update, 'test', lambda: test_playwright(update, context), exclusive=True)
+
+
+async def request_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE, view='week'):
+    """Запрос расписания через защиту от повторных нажатий и лимит частоты"""
+    # В общем чате объединяем только нажатия про одну и ту же группу
+    group_url = user_urls.get(update.effective_user.id)
+    await request_guard.run(
+        update, f'schedule:{view}', lambda: get_schedule(update, context, user_urls, view=view),
+        scope=group_url,
+    )
+
+async def schedule_today(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await request_schedule(update, context, view='today')
+
+async def schedule_tomorrow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await request_schedule(update, context, view='tomorrow')
+
 
 async def register_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Регистрация по названию группы"""
@@ -106,7 +153,7 @@ async def register_group(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     group_query = ' '.join(context.args)
-    logger.info(f"🔍 Пользователь {user_id} ищет группу: {group_query}")
+    logger.info(f"🔍 Поиск группы: {group_query}", extra={'user': user_id, 'stage': 'reg'})
     
     result = find_group(group_query)
     
@@ -155,23 +202,35 @@ async def handle_group_selection(update: Update, context: ContextTypes.DEFAULT_T
         selected_group = selected_text
     
     matches = context.user_data.get('group_matches', [])
-    for group_name, group_url in matches:
-        if group_name == selected_group:
-            user_urls[user_id] = group_url
-            
-            reply_markup = ReplyKeyboardMarkup([
-                ["🎯 Зарегистрировать группу"],
-                ["📅 Получить расписание", "❓ Помощь"]
-            ], resize_keyboard=True)
-            
-            await update.message.reply_text(
-                f"✅ Группа {group_name} зарегистрирована!\n\n"
-                f"Теперь нажми '📅 Получить расписание'!",
-                reply_markup=reply_markup
-            )
-            
-            context.user_data.pop('group_matches', None)
-            return
+    normalized = normalize_group_name(selected_group)
+    candidates = [
+        (group_name, group_url) for group_name, group_url in matches
+        if group_name == selected_group or normalize_group_name(group_name) == normalized
+    ]
+    if not candidates:
+        # Группу ввели вручную, а не кнопкой: ищем с учетом опечаток
+        found = find_group(selected_group)
+        if len(found) == 1:
+            candidates = found
+    
+    if candidates:
+        group_name, group_url = candidates[0]
+        user_urls[user_id] = group_url
+        
+        reply_markup = ReplyKeyboardMarkup([
+            ["🎯 Зарегистрировать группу"],
+            ["📅 Получить расписание", "❓ Помощь"],
+            ["📆 Сегодня", "📆 Завтра"]
+        ], resize_keyboard=True)
+        
+        await update.message.reply_text(
+            f"✅ Группа {group_name} зарегистрирована!\n\n"
+            f"Теперь нажми '📅 Получить расписание'!",
+            reply_markup=reply_markup
+        )
+        
+        context.user_data.pop('group_matches', None)
+        return
     
     await update.message.reply_text("❌ Ошибка выбора группы")
 
@@ -194,8 +253,9 @@ async def handle_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🎯 Регистрация:\n"
         "/reg название_группы\n\n"
         "📅 Получить расписание:\n"
-        "Нажми кнопку '📅 Получить расписание'\n\n"
-        "🔧 Диагностика:\n"
+        "Нажми кнопку '📅 Получить расписание'\n"
+        "На один день: '📆 Сегодня', '📆 Завтра' или /today, /tomorrow\n\n"
+        "🔧 Диагностика (для администраторов):\n"
         "/test - проверить работу парсера\n"
         "/logs - посмотреть логи\n\n"
         "🔄 Перезапуск: /start"
@@ -210,36 +270,115 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif text == "🎯 Зарегистрировать группу":
         await handle_register_button(update, context)
     elif text == "📅 Получить расписание":
-        await get_schedule(update, context, user_urls)
+        await request_schedule(update, context)
+    elif text == "📆 Сегодня":
+        await request_schedule(update, context, view='today')
+    elif text == "📆 Завтра":
+        await request_schedule(update, context, view='tomorrow')
     elif text == "❓ Помощь":
         await handle_help(update, context)
     else:
         await update.message.reply_text(
             "Используй кнопки или команды:\n"
             "/reg - регистрация группы\n"
-            "/start - инструкция\n"
-            "/test - диагностика"
+            "/start - инструкция"
         )
 
-def main():
-    load_groups_data()
-    
-    application = Application.builder().token(TOKEN).build()
+# Процессы-воркеры парсинга (SCRAPER_WORKERS > 0)
+scraper_workers = []
+
+# HTTP-эндпоинт /metrics в формате Prometheus
+metrics_server = MetricsServer.from_env()
+
+async def on_startup(application: Application):
+    """Запуск воркеров (или пула браузеров) и очереди отправки вместе с ботом"""
+    count = worker_count()
+    if count > 0:
+        scraper_workers.extend(start_workers(count))
+        logger.info(f"🛠 Запущено {count} воркеров парсинга")
+    else:
+        await get_browser_pool().start()
+        logger.info("🌐 Пул браузеров запущен")
+    get_outbound_queue().start()
     
-    # Добавляем кастомный обработчик логов
-    telegram_handler = TelegramLogHandler()
-    logger.addHandler(telegram_handler)
+    gauge_sources['schedule_cache'] = get_schedule_cache().stats
+    gauge_sources['outbound'] = lambda: {'sent': get_outbound_queue().sent, 'retries': get_outbound_queue().retries}
+    gauge_sources['http_fetcher'] = lambda: {'fast_hits': get_http_fetcher().fast_hits, 'fallbacks': get_http_fetcher().fallbacks}
+    gauge_sources['breaker'] = get_resilient_loader().stats
+    gauge_sources['handlers'] = request_guard.stats
+    await metrics_server.start()
+
+async def on_shutdown(application: Application):
+    """Остановка воркеров и браузеров, сохранение регистраций при остановке бота"""
+    await metrics_server.stop()
+    await get_outbound_queue().stop()
+    await get_http_fetcher().close()
+    await get_browser_pool().stop()
+    await asyncio.to_thread(stop_workers, scraper_workers)
+    get_scrape_queue().close()
+    get_change_tracker().store.close()
+    user_urls.close()
+
+def build_application(base_url=None):
+    """Собирает приложение со всеми обработчиками и фоновыми задачами.
+
+    base_url позволяет направить бота на локальный фейковый Bot API (нагрузочные тесты).
+    """
+    builder = Application.builder().token(TOKEN).post_init(on_startup).post_shutdown(on_shutdown)
+    # Обновления обрабатываются параллельно: долгий парсинг одного не блокирует остальных
+    builder = builder.concurrent_updates(int(os.getenv('HANDLER_CONCURRENCY', '64')))
+    if base_url:
+        builder = builder.base_url(base_url)
+    application = builder.build()
     
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("reg", register_group))
     application.add_handler(CommandHandler("help", handle_help))
-    application.add_handler(CommandHandler("test", test_playwright))
+    application.add_handler(CommandHandler("today", schedule_today))
+    application.add_handler(CommandHandler("tomorrow", schedule_tomorrow))
+    application.add_handler(CommandHandler("test", run_test))
     application.add_handler(CommandHandler("logs", show_logs))
+    application.add_handler(CommandHandler("stats", show_stats))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
+    # Пуш только тем, у чьей группы расписание действительно изменилось
+    if os.getenv('SCHEDULE_CHANGE_NOTIFY', '1') == '1':
+        get_change_tracker().subscribe(
+            lambda group_url, diff: push_schedule_changes(application.bot, user_urls, group_url, diff)
+        )
+    
+    if application.job_queue is not None:
+        # Периодический сброс регистраций в базу пачками
+        application.job_queue.run_repeating(
+            user_urls.flush_job,
+            interval=float(os.getenv('USERS_DB_FLUSH_INTERVAL', '5')),
+            name='users_flush'
+        )
+        # Подхват измененного groups_data.json без перезапуска
+        application.job_queue.run_repeating(
+            watch_groups_job,
+            interval=float(os.getenv('GROUPS_WATCH_INTERVAL', '30')),
+            name='groups_watch'
+        )
+        # Фоновое обновление расписаний, чтобы кнопка отвечала из кэша
+        SchedulePrefetcher.from_env(user_urls, load_schedule).start(application.job_queue)
+    else:
+        logger.warning("⚠️ JobQueue недоступна, фоновое обновление отключено")
+    
+    return application
+
+def main():
+    load_groups_data()
+    
+    application = build_application()
+    
     logger.info("Бот запущен...")
     
-    application.run_polling()
+    # BOT_MODE=webhook — прием обновлений через HTTP-сервер вместо polling
+    if os.getenv('BOT_MODE', 'polling') == 'webhook':
+        asyncio.run(WebhookServer.from_env(application).run())
+    else:
+        application.run_polling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Сравнение старого цикла query_selector и извлечения за один evaluate.
+
+Запуск из папки src:
+    python bench/bench_extract.py [fixture.html] [повторы]
+"""
+import os
+import sys
+import time
+import asyncio
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Infra.sheedule import SCHEDULE_ROOT_SELECTOR, extract_schedule
+from Infra.model import schedule_from_raw
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'schedule_page.html')
+
+
+def parsed_fields(raw):
+    """Разобранные поля занятий без исходного текста: его пробелы у двух способов разные"""
+    return [
+        (day.number, day.title, day.date, tuple(replace(lesson, text='') for lesson in day.lessons))
+        for day in schedule_from_raw(raw)
+    ]
+
+
+class CountingPage:
+    """Обертка над страницей, считающая IPC-вызовы в Chromium"""
+
+    def __init__(self, page):
+        self._page = page
+        self.calls = 0
+
+    async def query_selector(self, selector):
+        self.calls += 1
+        element = await self._page.query_selector(selector)
+        return CountingElement(self, element) if element else None
+
+    async def evaluate(self, expression, arg=None):
+        self.calls += 1
+        return await self._page.evaluate(expression, arg)
+
+
+class CountingElement:
+    def __init__(self, page, element):
+        self._page = page
+        self._element = element
+
+    async def text_content(self):
+        self._page.calls += 1
+        return await self._element.text_content()
+
+
+async def legacy_extract(page):
+    """Прежний цикл по nth-child с ограничением 10x10"""
+    all_containers = []
+    container_num = 1
+
+    while container_num <= 10:
+        container_selector = f'{SCHEDULE_ROOT_SELECTOR} > div:nth-child({container_num}) > div > div'
+        container = await page.query_selector(container_selector)
+
+        if not container:
+            break
+
+        container_data = {
+            'container_number': container_num,
+            'lessons': []
+        }
+
+        lesson_num = 1
+        while lesson_num <= 10:
+            lesson_selector = f'{container_selector} > div:nth-child({lesson_num})'
+            lesson_element = await page.query_selector(lesson_selector)
+
+            if not lesson_element:
+                break
+
+            text = await lesson_element.text_content()
+            if text and text.strip():
+                container_data['lessons'].append({
+                    'lesson_number': lesson_num,
+                    'text': text.strip()
+                })
+
+            lesson_num += 1
+
+        if container_data['lessons']:
+            all_containers.append(container_data)
+
+        container_num += 1
+
+    return all_containers
+
+
+async def measure(name, extractor, page, repeats):
+    counting = CountingPage(page)
+    result = None
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = await extractor(counting)
+    elapsed = (time.perf_counter() - started) / repeats
+    print(f"{name:<10} round trips: {counting.calls // repeats:>5}   "
+          f"время: {elapsed * 1000:8.2f} мс   дней: {len(result)}")
+    return result
+
+
+async def main(fixture_path, repeats):
+    from playwright.async_api import async_playwright
+
+    with open(fixture_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
+        page = await browser.new_page()
+        await page.set_content(html)
+
+        legacy = await measure('legacy', legacy_extract, page, repeats)
+        single = await measure('evaluate', extract_schedule, page, repeats)
+
+        await browser.close()
+
+    # Склеенный textContent и построчный текст должны разбираться в одни и те же занятия
+    same = parsed_fields(legacy) == parsed_fields(single)
+    print("✅ Результаты совпадают" if same else "❌ Результаты различаются")
+
+
+if __name__ == '__main__':
+    fixture_path = sys.argv[1] if len(sys.argv) > 1 else FIXTURE
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(fixture_path, repeats))
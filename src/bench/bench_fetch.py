@@ -0,0 +1,54 @@
+"""Проверка быстрого HTTP-пути на локальных фикстурах.
+
+Запуск из папки src:
+    python bench/bench_fetch.py [повторы]
+
+schedule_page.html — готовый HTML, должен разбираться без браузера.
+spa_shell.html     — оболочка SPA, должна уйти в Playwright.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fixture_server import serve_fixtures
+from Infra.fetcher import HttpFetcher
+from Infra.sheedule import parse_schedule_with_browser
+from Infra.browser_pool import get_browser_pool
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return result, (time.perf_counter() - started) * 1000
+
+
+async def main(repeats):
+    with serve_fixtures() as base_url:
+        page_url = f"{base_url}/schedule_page.html"
+        shell_url = f"{base_url}/spa_shell.html"
+        fetcher = HttpFetcher()
+
+        fast, first_ms = await timed(fetcher.fetch_schedule(page_url))
+        total = 0
+        for _ in range(repeats):
+            _, elapsed = await timed(fetcher.fetch_schedule(page_url))
+            total += elapsed
+        print(f"HTTP:       первый {first_ms:7.1f} мс, keep-alive в среднем {total / repeats:7.1f} мс, дней: {len(fast)}")
+
+        browser, browser_ms = await timed(parse_schedule_with_browser(page_url))
+        print(f"Playwright: {browser_ms:7.1f} мс, дней: {len(browser or [])}")
+        print("✅ Результаты совпадают" if fast == browser else "❌ Результаты различаются")
+
+        shell = await fetcher.fetch_schedule(shell_url)
+        print("✅ SPA-оболочка отправлена в браузер" if shell is None else "❌ SPA-оболочка разобрана по HTTP")
+
+        await fetcher.close()
+        await get_browser_pool().stop()
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    asyncio.run(main(repeats))
@@ -0,0 +1,103 @@
+"""Микробенчмарк поиска групп: линейный find_group против индекса.
+
+Печатает время построения индекса, его память и размер снимка, затем скорость
+поиска, включая запросы с опечатками.
+
+Запуск из папки src:
+    python bench/bench_groups.py [кол-во групп] [повторы]
+"""
+import os
+import sys
+import time
+import random
+import marshal
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Infra import groups
+
+PREFIXES = ['агро', 'аи', 'всэ', 'зк', 'идпо', 'исит', 'мен', 'сад', 'фик', 'эк', 'гд', 'спилс', 'ф', 'исп']
+FORMS = ['о', 'з', 'озо', 'д', 'в']
+
+
+def synthetic_database(size, seed=42):
+    rnd = random.Random(seed)
+    database = {}
+    number = 20000
+    while len(database) < size:
+        name = f"{rnd.choice(PREFIXES)}_{rnd.choice(PREFIXES)}-{rnd.choice(FORMS)}-{rnd.randint(20, 25)}/{rnd.randint(1, 9)}"
+        if name in database:
+            continue
+        database[name] = f"https://lk2.stgau.ru/WebApp/#/Rasp/Group/{number}"
+        number += 1
+    return database
+
+
+def legacy_find_group(database, query):
+    """Прежний поиск: до трех линейных проходов по базе"""
+    query = query.strip()
+    if query in database:
+        return [(query, database[query])]
+    if query.isdigit():
+        matches = [(name, url) for name, url in database.items() if query in url]
+        if matches:
+            return matches
+    matches = []
+    for group_name, group_url in database.items():
+        if query in group_name:
+            matches.append((group_name, group_url))
+        elif query.lower() in group_name.lower():
+            matches.append((group_name, group_url))
+    return matches
+
+
+def bench(name, func, queries, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            func(query)
+    elapsed = time.perf_counter() - started
+    per_query = elapsed / (repeats * len(queries)) * 1e6
+    print(f"{name:<8} {per_query:10.1f} мкс/запрос")
+
+
+def main(size, repeats):
+    database = synthetic_database(size)
+    names = list(database)
+    rnd = random.Random(1)
+    queries = (
+        [rnd.choice(names) for _ in range(20)] +                     # точные
+        [rnd.choice(names).upper() for _ in range(20)] +             # другой регистр
+        [database[rnd.choice(names)].rsplit('/', 1)[-1] for _ in range(20)] +  # номера
+        [rnd.choice(names)[2:8] for _ in range(20)] +                # подстроки
+        ['нетакойгруппы'] * 5
+    )
+    # Опечатки: замена и пропуск символа, другие разделители
+    typos = []
+    for _ in range(20):
+        name = list(rnd.choice(names).replace('_', ' '))
+        name[rnd.randrange(len(name))] = 'ж'
+        del name[rnd.randrange(len(name))]
+        typos.append(''.join(name))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    groups.groups_database = database
+    groups.group_index = groups.GroupIndex(database)
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    snapshot = marshal.dumps(groups.group_index.snapshot())
+    print(f"Групп: {size}, построение индекса: {elapsed * 1000:.0f} мс (под tracemalloc), "
+          f"память индекса: {memory / 2**20:.1f} МБ, снимок: {len(snapshot) / 2**20:.1f} МБ")
+
+    bench('legacy', lambda q: legacy_find_group(database, q), queries, repeats)
+    bench('index', groups.find_group, queries, repeats)
+    bench('fuzzy', groups.find_group, typos, repeats)
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    main(size, repeats)
@@ -0,0 +1,99 @@
+"""Память и скорость сериализации: словари + JSON против Day/Lesson + бинарного формата.
+
+Перед замерами проверяет разбор текста занятий на PARSE_CASES.
+
+Запуск из папки src:
+    python bench/bench_model.py [групп] [дней] [занятий в дне]
+"""
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fixture_server import DAY_NAMES, SUBJECTS
+from Infra.model import Lesson, schedule_from_raw, encode_schedule, decode_schedule
+
+# Текст ячейки -> (название, тип). Предметы на «Пр-», «Сем-», «Лек-», «Конс-» не должны
+# терять слова и получать чужой тип
+PARSE_CASES = [
+    ("1 пара 08:00-09:30\nПрограммирование\n(лаб)\nИванов И.И.\nауд. 101", 'Программирование', 'лабораторная'),
+    ("Проектирование информационных систем лек.\nИванов И.И.\nауд. 1", 'Проектирование информационных систем', 'лекция'),
+    ("Семейное право пр.\nПетрова А.С.\nауд. 2", 'Семейное право', 'практика'),
+    ("Лекционный курс истории\nСидоров П.П.", 'Лекционный курс истории', ''),
+    ("Консалтинг (сем.)\nСидоров П.П.", 'Консалтинг', 'семинар'),
+    ("Экзаменационная практика\nЛекция\nСидоров П.П.", 'Экзаменационная практика', 'лекция'),
+    ("Программирование (практ.)\nИванов И.И.", 'Программирование', 'практика'),
+    ("1 пара 08:00-09:30Физика (пр.)Сидоров П.П.ауд. 305", 'Физика', 'практика'),
+    ("2-я пара 09.40-11.10 Математика (лаб. работа) Петрова А.С. ауд. 214а", 'Математика', 'лабораторная'),
+]
+
+
+def check_parse_cases():
+    failed = 0
+    for text, subject, kind in PARSE_CASES:
+        lesson = Lesson.parse(1, text)
+        if (lesson.subject, lesson.kind) != (subject, kind):
+            failed += 1
+            print(f"❌ {text!r}: {lesson.subject!r}/{lesson.kind!r}, ожидалось {subject!r}/{kind!r}")
+    print(f"{'✅' if not failed else '❌'} Разбор занятий: {len(PARSE_CASES) - failed}/{len(PARSE_CASES)}")
+    return not failed
+
+
+def raw_schedule(days, lessons):
+    """То же, что вернул бы extract_schedule для generated.html"""
+    result = []
+    for day in range(days):
+        items = [{'lesson_number': 1, 'text': f'{DAY_NAMES[day % 6]}, {20 + day % 10}.10.2025'}]
+        for lesson in range(lessons):
+            subject, kind, teacher, room = SUBJECTS[(day + lesson) % len(SUBJECTS)]
+            items.append({
+                'lesson_number': lesson + 2,
+                'text': f'{lesson + 1} пара 08:00-09:30\n{subject} ({kind})\n{teacher}\n{room}',
+            })
+        result.append({'container_number': day + 1, 'lessons': items})
+    return result
+
+
+def measure_memory(build, count):
+    tracemalloc.start()
+    kept = [build() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return used / count
+
+
+def timed(func, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started) / repeats * 1e6
+
+
+def main(groups, days, lessons):
+    if not check_parse_cases():
+        sys.exit(1)
+    raw = raw_schedule(days, lessons)
+    model = schedule_from_raw(raw)
+    as_json = json.dumps(raw, ensure_ascii=False)
+    as_binary = encode_schedule(model)
+    assert decode_schedule(as_binary) == model
+
+    print(f"Групп: {groups}, дней: {days}, занятий в дне: {lessons}")
+    print(f"Размер:  JSON {len(as_json.encode('utf-8')):>7} байт, бинарный {len(as_binary):>7} байт")
+    print(f"Память на группу: словари {measure_memory(lambda: json.loads(as_json), groups) / 1024:7.1f} КБ, "
+          f"Day/Lesson {measure_memory(lambda: decode_schedule(as_binary), groups) / 1024:7.1f} КБ")
+    repeats = 500
+    print(f"Кодирование:   JSON {timed(lambda: json.dumps(raw, ensure_ascii=False), repeats):7.1f} мкс, "
+          f"бинарный {timed(lambda: encode_schedule(model), repeats):7.1f} мкс")
+    print(f"Декодирование: JSON {timed(lambda: json.loads(as_json), repeats):7.1f} мкс, "
+          f"бинарный {timed(lambda: decode_schedule(as_binary), repeats):7.1f} мкс")
+    print(f"Разбор текста занятий: {timed(lambda: schedule_from_raw(raw), repeats):7.1f} мкс")
+
+
+if __name__ == '__main__':
+    args = [int(value) for value in sys.argv[1:4]]
+    main(*(args + [500, 6, 6][len(args):]))
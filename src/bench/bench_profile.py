@@ -0,0 +1,62 @@
+"""Сравнение полного и облегченного профиля загрузки страницы.
+
+Запуск из папки src:
+    python bench/bench_profile.py [url] [повторы]
+
+Без url используется локальная фикстура; для оценки на настоящем сайте
+передайте ссылку на группу. Печатает задержку и сэкономленные байты.
+"""
+import os
+import sys
+import asyncio
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.fixture_server import serve_fixtures
+from Infra.browser_pool import get_browser_pool
+from Infra.scrape_profile import ScrapeProfile
+from Infra.sheedule import SCHEDULE_READY_SELECTOR, extract_schedule
+
+
+async def scrape(url, profile):
+    async with get_browser_pool().page() as page:
+        stats = await profile.apply(page, url)
+        await page.goto(url, wait_until=profile.wait_until, timeout=profile.goto_timeout)
+        try:
+            await page.wait_for_selector(profile.wait_selector, timeout=profile.selector_timeout)
+        except Exception:
+            pass
+        if profile.wait_until != 'networkidle':
+            # Дожидаемся уже начатых запросов, чтобы честно посчитать байты
+            await page.wait_for_load_state('load')
+        await extract_schedule(page)
+        return stats.total, stats.bytes_loaded, sum(stats.blocked.values())
+
+
+async def run(url, repeats):
+    lean = ScrapeProfile(wait_selector=SCHEDULE_READY_SELECTOR, measure_bytes=True)
+    full = replace(lean, blocked_types=frozenset(), block_third_party=False, wait_until='networkidle')
+
+    results = {}
+    for name, profile in (('full', full), ('lean', lean)):
+        samples = [await scrape(url, profile) for _ in range(repeats)]
+        latency = sum(s[0] for s in samples) / repeats
+        loaded = sum(s[1] for s in samples) / repeats
+        blocked = sum(s[2] for s in samples) / repeats
+        results[name] = (latency, loaded)
+        print(f"{name:<5} {latency * 1000:8.0f} мс   {loaded / 1024:8.1f} КБ   заблокировано {blocked:.0f}")
+
+    saved_ms = (results['full'][0] - results['lean'][0]) * 1000
+    saved_kb = (results['full'][1] - results['lean'][1]) / 1024
+    print(f"Экономия на скрейп: {saved_ms:.0f} мс, {saved_kb:.1f} КБ")
+    await get_browser_pool().stop()
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    if len(sys.argv) > 1:
+        asyncio.run(run(sys.argv[1], repeats))
+    else:
+        with serve_fixtures() as base_url:
+            asyncio.run(run(f"{base_url}/schedule_page.html", repeats))
@@ -0,0 +1,70 @@
+"""Фейковый Telegram Bot API для нагрузочных тестов.
+
+Отвечает на /bot<token>/<method> так, как ответил бы Telegram, и считает вызовы.
+Бот направляется на него через build_application(base_url=f"{url}/bot").
+"""
+import time
+import asyncio
+from collections import Counter
+
+
+class FakeTelegramApi:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.03):
+        self.host = host
+        self.port = port
+        self.latency = latency      # имитация сетевой задержки до api.telegram.org
+        self.calls = Counter()
+        self._message_id = 0
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _params(self, request):
+        if request.content_type == 'application/json':
+            return await request.json()
+        return dict(await request.post())
+
+    def _message(self, params):
+        self._message_id += 1
+        chat_id = int(params.get('chat_id', 0))
+        return {
+            'message_id': int(params.get('message_id', self._message_id)),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': params.get('text', ''),
+        }
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        method = request.match_info['method']
+        params = await self._params(request)
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'LoadTestBot', 'username': 'load_test_bot'}
+        elif method in ('sendMessage', 'editMessageText'):
+            result = self._message(params)
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
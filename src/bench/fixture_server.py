@@ -0,0 +1,97 @@
+"""Локальный HTTP-сервер с сохраненными страницами расписания.
+
+    with serve_fixtures() as base_url:
+        await parse_schedule_with_containers(f"{base_url}/schedule_page.html")
+
+Параметр ?delay=мс задерживает ответ, чтобы имитировать медленный сайт.
+/generated.html?days=N&lessons=M отдает страницу произвольного размера
+(патологически большие расписания), spa_shell.html?delay=мс — страницу,
+которая дорисовывает расписание через JS с задержкой.
+"""
+import os
+import time
+import threading
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+DAY_NAMES = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота']
+SUBJECTS = [
+    ('Высшая математика', 'лек.', 'Иванов И.И.', 'ауд. 101'),
+    ('Информатика', 'лаб.', 'Петрова А.С.', 'ауд. 214'),
+    ('Физика', 'пр.', 'Сидоров П.П.', 'ауд. 305'),
+    ('История России', 'лек.', 'Кузнецова Е.В.', 'ауд. 12'),
+]
+
+
+def render_schedule_page(days, lessons):
+    """Страница с той же разметкой, что schedule_page.html, но любого размера"""
+    header = ''.join(f'<div class="h{i}">{i}</div>' for i in range(1, 7))
+    day_blocks = []
+    for day in range(days):
+        items = [f'<div class="day-header">{DAY_NAMES[day % 6]}, {20 + day % 10}.10.2025</div>']
+        for lesson in range(lessons):
+            subject, kind, teacher, room = SUBJECTS[(day + lesson) % len(SUBJECTS)]
+            items.append(
+                f'<div class="lesson"><span>{lesson + 1} пара 08:00-09:30</span> '
+                f'<span>{subject} ({kind})</span> <span>{teacher}</span> <span>{room}</span></div>'
+            )
+        day_blocks.append(f'<div class="day"><div><div>{"".join(items)}</div></div></div>')
+    return (
+        '<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8"><title>Расписание</title></head>'
+        f'<body><div id="page-main"><div class="box-limiter"><div>{header}'
+        f'<div><div><div class="days">{"".join(day_blocks)}</div></div></div>'
+        '</div></div></div></body></html>'
+    )
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, как у настоящего сайта
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        delay = int(query.get('delay', ['0'])[0])
+        if delay and parts.path != '/spa_shell.html':
+            time.sleep(delay / 1000)
+
+        if parts.path == '/generated.html':
+            body = render_schedule_page(
+                int(query.get('days', ['6'])[0]),
+                int(query.get('lessons', ['5'])[0]),
+            ).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_fixtures(directory=FIXTURES_DIR, port=0):
+    """Запускает сервер в фоновом потоке и возвращает его базовый URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), partial(FixtureHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    import sys
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8800
+    with serve_fixtures(port=port) as base_url:
+        print(f"Фикстуры доступны на {base_url}")
+        threading.Event().wait()
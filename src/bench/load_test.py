@@ -0,0 +1,167 @@
+"""Нагрузочный тест: N пользователей одновременно жмут «📅 Получить расписание».
+
+Все внешнее подменено локальным: сайт — fixture_server, Telegram — FakeTelegramApi.
+Запуск из папки src:
+    python bench/load_test.py --users 50 --presses 3 --groups 10 --page "generated.html?days=6&lessons=6&delay=200"
+
+Печатает запросы/сек, перцентили задержки и пиковый RSS (бот + Chromium).
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+import resource
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SCHEDULE_BUTTON = "📅 Получить расписание"
+
+
+def process_tree_rss(root_pid):
+    """RSS процесса и всех его потомков в байтах (Linux /proc)"""
+    children = {}
+    rss = {}
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            pid = int(entry)
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+class RssSampler:
+    """Фоновый замер пикового RSS дерева процессов"""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if os.path.isdir('/proc'):
+                self.peak = max(self.peak, process_tree_rss(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        # Без /proc — хотя бы максимум самого процесса
+        self.peak = max(self.peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] if ordered else 0.0
+
+
+def make_update(update_id, user_id, text):
+    with open(os.path.join(FIXTURES_DIR, 'update_schedule.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['update_id'] = update_id
+    data['message']['message_id'] = update_id
+    data['message']['chat']['id'] = user_id
+    data['message']['from']['id'] = user_id
+    data['message']['text'] = text
+    return data
+
+
+async def run(args, base_url):
+    from telegram import Update
+    from bench.fake_telegram import FakeTelegramApi
+    import ParsStgau
+
+    api = await FakeTelegramApi(latency=args.api_latency / 1000).start()
+    application = ParsStgau.build_application(base_url=f"{api.url}/bot")
+    await application.initialize()
+    await application.post_init(application)
+
+    # Пользователи распределены по группам, все группы — одна страница фикстур
+    for i in range(args.users):
+        ParsStgau.user_urls[10_000 + i] = f"{base_url}/{args.page}{'&' if '?' in args.page else '?'}g={i % args.groups}"
+
+    latencies = []
+    failures = 0
+    update_id = 0
+
+    async def press(user_id):
+        nonlocal update_id, failures
+        for _ in range(args.presses):
+            update_id += 1
+            update = Update.de_json(make_update(update_id, user_id, SCHEDULE_BUTTON), application.bot)
+            started = time.perf_counter()
+            try:
+                await application.process_update(update)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(press(10_000 + i) for i in range(args.users)))
+        elapsed = time.perf_counter() - started
+
+    await application.shutdown()
+    await application.post_shutdown(application)
+    await api.stop()
+
+    total = len(latencies)
+    print(f"Пользователей: {args.users}, нажатий: {total}, групп: {args.groups}, страница: {args.page}")
+    print(f"Время: {elapsed:.2f} с, запросов/с: {total / elapsed:.2f}, ошибок: {failures}")
+    print(f"Задержка p50/p95/p99: {percentile(latencies, 50):.2f} / "
+          f"{percentile(latencies, 95):.2f} / {percentile(latencies, 99):.2f} с")
+    print(f"Пиковый RSS (бот + Chromium): {rss.peak / 1024 / 1024:.0f} МБ")
+    print(f"Вызовы Bot API: {dict(api.calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--presses', type=int, default=3)
+    parser.add_argument('--groups', type=int, default=5)
+    parser.add_argument('--page', default='schedule_page.html',
+                        help='фикстура: schedule_page.html, generated.html?days=30&lessons=40, '
+                             'spa_shell.html?delay=2000, ...?delay=мс для медленного сайта')
+    parser.add_argument('--api-latency', type=float, default=30, help='задержка фейкового Bot API, мс')
+    args = parser.parse_args()
+
+    # Изолированное окружение: временные базы, без метрик и фоновых задач
+    workdir = tempfile.mkdtemp(prefix='parsagro-load-')
+    os.environ.setdefault('BOT_TOKEN', '123456:LOAD-TEST')
+    os.environ.setdefault('USERS_DB_PATH', os.path.join(workdir, 'users.db'))
+    os.environ.setdefault('SCRAPE_QUEUE_PATH', os.path.join(workdir, 'jobs.db'))
+    os.environ.setdefault('METRICS_PORT', '0')
+    os.environ.setdefault('SCHEDULE_CHANGE_NOTIFY', '0')
+    os.environ.setdefault('HANDLER_RATE_LIMIT', '0')
+
+    from bench.fixture_server import serve_fixtures
+    with serve_fixtures() as base_url:
+        asyncio.run(run(args, base_url))
+
+
+if __name__ == '__main__':
+    main()
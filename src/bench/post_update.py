@@ -0,0 +1,39 @@
+"""Отправка записанного Update на локальный вебхук.
+
+Запуск из папки src (бот запущен с BOT_MODE=webhook):
+    python bench/post_update.py [update.json] [url] [количество]
+"""
+import os
+import sys
+import json
+import asyncio
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'update_schedule.json')
+
+
+async def main(path, url, count):
+    import aiohttp
+
+    with open(path, 'r', encoding='utf-8') as f:
+        update = json.load(f)
+    headers = {'X-Telegram-Bot-Api-Secret-Token': os.getenv('WEBHOOK_SECRET', '')}
+
+    async with aiohttp.ClientSession() as session:
+        async def post(i):
+            body = dict(update, update_id=update['update_id'] + i)
+            async with session.post(url, json=body, headers=headers) as response:
+                return response.status
+
+        statuses = await asyncio.gather(*(post(i) for i in range(count)))
+        print(f"Ответы: {dict((s, statuses.count(s)) for s in set(statuses))}")
+
+        health_url = url.rsplit('/', 1)[0] + '/health'
+        async with session.get(health_url) as response:
+            print(f"health: {await response.text()}")
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else FIXTURE
+    url = sys.argv[2] if len(sys.argv) > 2 else 'http://127.0.0.1:5000/telegram'
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    asyncio.run(main(path, url, count))
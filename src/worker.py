@@ -0,0 +1,102 @@
+import os
+import signal
+import asyncio
+import logging
+from dotenv import load_dotenv
+from Infra.workqueue import get_scrape_queue, worker_count
+from Infra.sheedule import parse_schedule_with_containers
+from Infra.browser_pool import get_browser_pool
+from Infra.fetcher import get_http_fetcher
+from Infra.logs import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(worker_id, concurrency):
+    """Забирает задачи из общей очереди и публикует результаты"""
+    queue = get_scrape_queue()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    deadline = float(os.getenv('SCHEDULE_DEADLINE', '25'))
+    await get_browser_pool().start()
+    logger.info(f"🛠 Воркер {worker_id} запущен (параллельно {concurrency})")
+
+    async def slot(slot_id):
+        name = f"{worker_id}/{slot_id}"
+        while not stop.is_set():
+            job = await asyncio.to_thread(queue.claim, name)
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=queue.poll_interval * 5)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, group_url = job
+            try:
+                # Зависшая страница не должна занимать слот воркера дольше дедлайна
+                schedule = await asyncio.wait_for(parse_schedule_with_containers(group_url), timeout=deadline)
+                error = None if schedule is not None else "парсинг не удался"
+            except asyncio.TimeoutError:
+                schedule, error = None, f"дедлайн {deadline:.0f} с"
+            except Exception as e:
+                schedule, error = None, str(e)
+            await asyncio.to_thread(queue.complete, job_id, group_url, schedule, error)
+
+    try:
+        await asyncio.gather(*(slot(i) for i in range(concurrency)))
+    finally:
+        await get_http_fetcher().close()
+        await get_browser_pool().stop()
+        queue.close()
+        logger.info(f"🛑 Воркер {worker_id} остановлен")
+
+
+def run_worker(worker_id):
+    """Точка входа процесса-воркера"""
+    load_dotenv(".env.txt")
+    setup_logging()
+    concurrency = int(os.getenv('WORKER_CONCURRENCY', os.getenv('BROWSER_MAX_CONCURRENCY', '4')))
+    asyncio.run(serve(worker_id, concurrency))
+
+
+def start_workers(count):
+    """Запускает count процессов-воркеров рядом с ботом"""
+    import multiprocessing
+
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for worker_id in range(count):
+        process = context.Process(target=run_worker, args=(f"w{worker_id}",), daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def stop_workers(processes, timeout=15):
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout)
+
+
+if __name__ == "__main__":
+    # Отдельный запуск: python worker.py [количество процессов]
+    import sys
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else max(worker_count(), 1)
+    if count == 1:
+        run_worker(f"{os.getpid()}")
+    else:
+        workers = start_workers(count)
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            stop_workers(workers)